@@ -1,3 +1,9 @@
-from .server import app
+__version__ = "0.1.0"
 
-__version__ = "0.1.0" 
\ No newline at end of file
+
+def __getattr__(name):
+    # The server registers tracing and builds the agent on import, so only load it when the app is asked for
+    if name == "app":
+        from .server import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Any, AsyncIterator, Dict, List, Tuple
 from openinference.instrumentation import using_session
 from openinference.semconv.trace import SpanAttributes
 from opentelemetry import trace
@@ -6,12 +6,11 @@ from opentelemetry.trace import Status, StatusCode
 from agent.schema import RequestFormat, ResponseFormat
 from agent.prompts import Prompts
 from agent.caching import LRUCache
-from agent.langgraph_agent import LangGraphResearchAgent
+from agent.langgraph_agent import get_langgraph_agent
 from dotenv import load_dotenv
 from agent.constants import PROJECT_NAME, AGENT_NAME, SPAN_TYPE
 import os
 import logging
-import asyncio
 
 logger = logging.getLogger("agent_demo")
 
@@ -22,39 +21,36 @@ load_dotenv()
 class Agent:
 
     def __init__(self):
-        self.langgraph_agent = LangGraphResearchAgent()
+        self.langgraph_agent = get_langgraph_agent()
         self.cache = LRUCache()
 
-    @tracer.start_as_current_span(
-        name=AGENT_NAME, attributes={SpanAttributes.OPENINFERENCE_SPAN_KIND: SPAN_TYPE}
-    )
-    def analyze_request(self, message: RequestFormat) -> Dict:
-        """Analyze the request and determine the appropriate response using LangGraph"""
-        conversation_hash = message.conversation_hash
-        request = message.customer_message
-        
-        # Get or create session context
+    def _get_session(self, conversation_hash: str) -> Tuple[Any, str]:
+        """Get or create the session context and id for a conversation"""
         stuff = self.cache.get(conversation_hash)
         if not stuff:
-            context = []
+            context: List = []
             session_id = self.cache.set(conversation_hash, context)
-        else:
-            context = stuff[0]
-            session_id = stuff[1]
-        
-        current_span = trace.get_current_span()
-        current_span.set_attribute(SpanAttributes.SESSION_ID, str(session_id))
-        current_span.set_attribute(SpanAttributes.INPUT_VALUE, request)
-        
-        try:
-            with using_session(session_id):
-                # Use LangGraph agent to process the request
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                try:
-                    result = loop.run_until_complete(
-                        self.langgraph_agent.process_request(request, session_id, context)
-                    )
+            return context, session_id
+        return stuff[0], stuff[1]
+
+    async def analyze_request(self, message: RequestFormat) -> Dict:
+        """Analyze the request and determine the appropriate response using LangGraph"""
+        with tracer.start_as_current_span(
+            name=AGENT_NAME, attributes={SpanAttributes.OPENINFERENCE_SPAN_KIND: SPAN_TYPE}
+        ) as current_span:
+            conversation_hash = message.conversation_hash
+            request = message.customer_message
+            
+            # Get or create session context
+            context, session_id = self._get_session(conversation_hash)
+            
+            current_span.set_attribute(SpanAttributes.SESSION_ID, str(session_id))
+            current_span.set_attribute(SpanAttributes.INPUT_VALUE, request)
+            
+            try:
+                with using_session(session_id):
+                    # Run the LangGraph agent on the caller's event loop
+                    result = await self.langgraph_agent.process_request(request, session_id, context)
                     
                     response = result.get("response", "No response generated")
                     
@@ -73,21 +69,66 @@ class Agent:
                         "plan": result.get("plan"),
                         "research_data": result.get("research_data")
                     }
-                    
-                finally:
-                    loop.close()
-                    
-        except Exception as e:
-            error_response = {
-                "response": "I apologize, but I'm having trouble processing your request. Please try again."
-            }
-            logger.error(f"Error processing request with LangGraph: {str(e)}")
-            current_span.set_status(Status(StatusCode.ERROR))
-            return error_response
+                        
+            except Exception as e:
+                error_response = {
+                    "response": "I apologize, but I'm having trouble processing your request. Please try again."
+                }
+                logger.error(f"Error processing request with LangGraph: {str(e)}")
+                current_span.set_status(Status(StatusCode.ERROR))
+                return error_response
+
+    async def stream_request(self, message: RequestFormat) -> AsyncIterator[Dict]:
+        """Analyze the request using LangGraph, yielding response tokens as they are generated and then the full result"""
+        with tracer.start_as_current_span(
+            name=AGENT_NAME, attributes={SpanAttributes.OPENINFERENCE_SPAN_KIND: SPAN_TYPE}
+        ) as current_span:
+            conversation_hash = message.conversation_hash
+            request = message.customer_message
+            
+            # Get or create session context
+            context, session_id = self._get_session(conversation_hash)
+            
+            current_span.set_attribute(SpanAttributes.SESSION_ID, str(session_id))
+            current_span.set_attribute(SpanAttributes.INPUT_VALUE, request)
+            
+            try:
+                with using_session(session_id):
+                    async for event in self.langgraph_agent.process_request_stream(request, session_id, context):
+                        if event["type"] == "token":
+                            yield event
+                            continue
+                        
+                        response = event.get("response", "No response generated")
+                        
+                        # Cache the interaction
+                        self.cache.add_interaction(conversation_hash, request, response)
+                        
+                        # Set span attributes with additional context
+                        current_span.set_attribute(SpanAttributes.OUTPUT_VALUE, str(response))
+                        current_span.set_attribute("intent", event.get("intent", "unknown"))
+                        current_span.set_attribute("plan", str(event.get("plan", [])))
+                        current_span.set_status(Status(StatusCode.OK))
+                        
+                        yield {
+                            "type": "result",
+                            "response": response,
+                            "intent": event.get("intent"),
+                            "plan": event.get("plan"),
+                            "research_data": event.get("research_data")
+                        }
+                        
+            except Exception as e:
+                logger.error(f"Error streaming request with LangGraph: {str(e)}")
+                current_span.set_status(Status(StatusCode.ERROR))
+                yield {
+                    "type": "result",
+                    "response": "I apologize, but I'm having trouble processing your request. Please try again."
+                }
 
-    def handle_request(self, message: RequestFormat) -> ResponseFormat:
+    async def handle_request(self, message: RequestFormat) -> ResponseFormat:
         """Process a request and generate a response"""
 
         # Analyze the request
-        analysis = self.analyze_request(message)
+        analysis = await self.analyze_request(message)
         return ResponseFormat(**analysis)
\ No newline at end of file
@@ -1,11 +1,35 @@
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 import os
+import random
+import re
+import weakref
+from agent.caching import TTLCache
+from agent.constants import ARXIV_DOWNLOAD_CONCURRENCY, ARXIV_DOWNLOAD_RETRIES
 
 logger = logging.getLogger("simple_arxiv_client")
 
+# Error text ArXiv's PDF server returns when it is throttling us
+RATE_LIMIT_MARKERS = ("429", "503", "rate limit", "too many requests")
+
+# New-style (2301.12345) and old-style (hep-th/9901001) IDs, bare or inside abs/pdf URLs, with any version suffix
+ARXIV_ID_PATTERN = re.compile(r"((?<![\d.])\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(?:v\d+)?")
+
+DEFAULT_STORAGE_PATH = os.path.expanduser("~/.arxiv-mcp-server/papers")
+# Storage directories already created in this process
+_created_storage_paths = set()
+
+def extract_arxiv_id(value: str) -> Optional[str]:
+    """Get the unversioned arXiv ID from an ID or ArXiv URL, or None if there isn't one"""
+    match = ARXIV_ID_PATTERN.search(value)
+    return match.group(1) if match else None
+
+def pdf_filename(paper_id: str) -> str:
+    """Get the storage filename for a paper; old-style IDs contain a "/" that would otherwise become a subdirectory"""
+    return f"{paper_id.replace('/', '_')}.pdf"
+
 @dataclass
 class ArxivResult:
     """Result from ArXiv operations"""
@@ -13,16 +37,70 @@ class ArxivResult:
     data: Any
     error: Optional[str] = None
 
+@dataclass(slots=True)
+class PaperRecord:
+    """Metadata and content for a single paper, kept compact for caching"""
+    paper_id: str
+    title: str
+    authors: Tuple[str, ...]
+    abstract: str
+    categories: Tuple[str, ...]
+    published: str
+    content: Optional[str] = None
+    
+    def to_dict(self, pdf_path: Optional[str] = None) -> Dict[str, Any]:
+        """Convert to the read_paper result format"""
+        return {
+            "paper_id": self.paper_id,
+            "title": self.title,
+            "authors": list(self.authors),
+            "abstract": self.abstract,
+            "content": self.content,
+            "categories": list(self.categories),
+            "published": self.published,
+            "pdf_path": pdf_path
+        }
+
 class SimpleArxivClient:
     """Simple ArXiv client using the arxiv Python library"""
     
-    def __init__(self):
-        self.storage_path = os.path.expanduser("~/.arxiv-mcp-server/papers")
-        os.makedirs(self.storage_path, exist_ok=True)
+    def __init__(self, storage_path: Optional[str] = None):
+        self.storage_path = storage_path or DEFAULT_STORAGE_PATH
+        if self.storage_path not in _created_storage_paths:
+            os.makedirs(self.storage_path, exist_ok=True)
+            _created_storage_paths.add(self.storage_path)
+        # One arxiv.Client for all calls so its HTTP session (and rate limiting) is shared
+        self._client = None
+        # ArXiv listings update daily, so search results are reused for a day; paper metadata is effectively fixed
+        self.search_cache = TTLCache(max_size=512, expiry_minutes=24 * 60)
+        self.paper_cache = TTLCache(max_size=1024, expiry_minutes=7 * 24 * 60)
+        # Cap concurrent PDF downloads so a large fan-out doesn't get throttled; one semaphore per event loop,
+        # since the client outlives any single asyncio.run and asyncio primitives bind to one loop
+        self._download_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+    
+    def _download_semaphore(self) -> asyncio.Semaphore:
+        """Get the download semaphore for the running event loop, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._download_semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._download_semaphores[loop] = asyncio.Semaphore(ARXIV_DOWNLOAD_CONCURRENCY)
+        return semaphore
+    
+    def _get_client(self) -> Any:
+        """Get the shared arxiv.Client, creating it on first use"""
+        if self._client is None:
+            import arxiv
+            self._client = arxiv.Client()
+        return self._client
         
     async def search_papers(self, query: str, max_results: int = 10, 
                           date_from: Optional[str] = None, categories: Optional[List[str]] = None) -> ArxivResult:
         """Search for papers on ArXiv"""
+        cache_key = (" ".join(query.lower().split()), max_results, date_from, tuple(categories or ()))
+        cached_result = self.search_cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
+        
         try:
             import arxiv
             
@@ -40,12 +118,14 @@ class SimpleArxivClient:
                 sort_by=arxiv.SortCriterion.Relevance
             )
             
-            # Create client and execute search
-            client = arxiv.Client()
+            # Create client and execute search (the arxiv library blocks, so run it in a thread)
+            client = self._get_client()
+            results = await asyncio.to_thread(list, client.results(search))
             papers = []
-            for result in client.results(search):
+            for result in results:
                 paper_data = {
-                    "id": result.entry_id.split("/")[-1],  # Extract arXiv ID
+                    # Unversioned arXiv ID, keeping the archive prefix of old-style IDs
+                    "id": extract_arxiv_id(result.entry_id) or result.get_short_id(),
                     "title": result.title,
                     "authors": [str(author) for author in result.authors],
                     "abstract": result.summary,
@@ -56,13 +136,15 @@ class SimpleArxivClient:
                 }
                 papers.append(paper_data)
             
-            return ArxivResult(
+            search_result = ArxivResult(
                 success=True,
                 data={
                     "papers": papers,
                     "papers_found": len(papers)
                 }
             )
+            self.search_cache.set(cache_key, search_result)
+            return search_result
             
         except ImportError:
             return ArxivResult(
@@ -74,26 +156,128 @@ class SimpleArxivClient:
             logger.error(f"Error searching ArXiv: {str(e)}")
             return ArxivResult(success=False, data=None, error=str(e))
     
+    async def _fetch_papers(self, paper_ids: List[str]) -> Dict[str, Any]:
+        """Fetch metadata for several papers with a single ArXiv query, keyed by the requested IDs.
+
+        If the batch query fails, each paper is fetched on its own so one bad ID only fails that paper;
+        papers whose own lookup fails map to the exception.
+        """
+        # An empty id_list means no ID filter, which would page through the whole search
+        if not paper_ids:
+            return {}
+        
+        import arxiv
+        
+        search = arxiv.Search(id_list=paper_ids)
+        client = self._get_client()
+        try:
+            results = await asyncio.to_thread(list, client.results(search))
+        except Exception as e:
+            if len(paper_ids) == 1:
+                raise
+            logger.warning(f"Batch lookup of {len(paper_ids)} papers failed, fetching them one at a time: {str(e)}")
+            return await self._fetch_papers_individually(paper_ids)
+        
+        # Index by both the versioned and unversioned ID so either form of request matches
+        by_id = {}
+        for result in results:
+            by_id[result.get_short_id()] = result
+            by_id.setdefault(extract_arxiv_id(result.entry_id), result)
+        return {paper_id: by_id.get(paper_id) for paper_id in paper_ids}
+    
+    async def _fetch_papers_individually(self, paper_ids: List[str]) -> Dict[str, Any]:
+        """Fetch papers one query at a time, mapping each paper whose lookup fails to its exception"""
+        papers = {}
+        # One at a time, since the shared client already spaces out its requests to ArXiv
+        for paper_id in paper_ids:
+            try:
+                papers.update(await self._fetch_papers([paper_id]))
+            except Exception as e:
+                logger.error(f"Error looking up paper {paper_id}: {str(e)}")
+                papers[paper_id] = e
+        return papers
+    
     async def download_paper(self, paper_id: str) -> ArxivResult:
         """Download a paper by ArXiv ID"""
+        return (await self.download_papers([paper_id]))[0]
+    
+    async def download_papers(self, paper_ids: List[str]) -> List[ArxivResult]:
+        """Download several papers by ArXiv ID, looking them all up in one query and downloading concurrently"""
+        if not paper_ids:
+            return []
+        
+        papers, lookup_error = await self._lookup_papers(paper_ids)
+        if lookup_error is not None:
+            return [lookup_error for _ in paper_ids]
+        
+        return list(await asyncio.gather(
+            *(self._download_pdf(paper_id, papers[paper_id]) for paper_id in paper_ids)
+        ))
+    
+    async def download_and_read_papers(self, paper_ids: List[str]) -> List[ArxivResult]:
+        """Download and read several papers, reading each one as soon as its own download finishes"""
+        if not paper_ids:
+            return []
+        
+        papers, lookup_error = await self._lookup_papers(paper_ids)
+        if lookup_error is not None:
+            return [lookup_error for _ in paper_ids]
+        
+        async with asyncio.TaskGroup() as task_group:
+            tasks = [
+                task_group.create_task(self._download_then_read(paper_id, papers[paper_id]))
+                for paper_id in paper_ids
+            ]
+        return [task.result() for task in tasks]
+    
+    async def _download_then_read(self, paper_id: str, paper: Any) -> ArxivResult:
+        """Download one paper and then read it, labelling which step failed"""
+        download_result = await self._download_pdf(paper_id, paper)
+        if not download_result.success:
+            return ArxivResult(success=False, data=None, error=f"Failed to download paper: {download_result.error}")
+        
+        read_result = await self.read_paper(paper_id)
+        if not read_result.success:
+            return ArxivResult(success=False, data=None, error=f"Failed to read paper: {read_result.error}")
+        return read_result
+    
+    async def _lookup_papers(self, paper_ids: List[str]) -> Tuple[Dict[str, Any], Optional[ArxivResult]]:
+        """Fetch and cache metadata for several papers, returning a failed result instead of raising"""
         try:
-            import arxiv
-            
-            # Search for the specific paper
-            search = arxiv.Search(id_list=[paper_id])
-            client = arxiv.Client()
-            paper = next(client.results(search), None)
-            
-            if not paper:
-                return ArxivResult(
-                    success=False,
-                    data=None,
-                    error=f"Paper {paper_id} not found"
-                )
-            
-            # Download PDF
-            pdf_path = os.path.join(self.storage_path, f"{paper_id}.pdf")
-            paper.download_pdf(dirpath=self.storage_path, filename=f"{paper_id}.pdf")
+            papers = await self._fetch_papers(paper_ids)
+        except ImportError:
+            return {}, ArxivResult(
+                success=False,
+                data=None,
+                error="arxiv library not installed. Install with: pip install arxiv"
+            )
+        except Exception as e:
+            logger.error(f"Error looking up papers {', '.join(paper_ids)}: {str(e)}")
+            return {}, ArxivResult(success=False, data=None, error=str(e))
+        
+        # Keep the metadata so reading these papers afterwards doesn't query ArXiv again
+        for paper_id, paper in papers.items():
+            if paper and not isinstance(paper, Exception):
+                self._cache_paper_content(paper_id, paper)
+        return papers, None
+    
+    async def _download_pdf(self, paper_id: str, paper: Any) -> ArxivResult:
+        """Download the PDF for a paper whose metadata has already been fetched"""
+        if isinstance(paper, Exception):
+            return ArxivResult(success=False, data=None, error=str(paper))
+        if not paper:
+            return ArxivResult(
+                success=False,
+                data=None,
+                error=f"Paper {paper_id} not found"
+            )
+        
+        try:
+            # A downloaded PDF never changes, so only fetch it the first time
+            pdf_path = os.path.join(self.storage_path, pdf_filename(paper_id))
+            if not os.path.exists(pdf_path):
+                async with self._download_semaphore():
+                    await self._download_with_retry(paper, paper_id)
             
             return ArxivResult(
                 success=True,
@@ -105,50 +289,66 @@ class SimpleArxivClient:
                 }
             )
             
-        except ImportError:
-            return ArxivResult(
-                success=False,
-                data=None,
-                error="arxiv library not installed. Install with: pip install arxiv"
-            )
         except Exception as e:
             logger.error(f"Error downloading paper {paper_id}: {str(e)}")
             return ArxivResult(success=False, data=None, error=str(e))
     
+    async def _download_with_retry(self, paper: Any, paper_id: str) -> None:
+        """Download a PDF, backing off with jitter and retrying when ArXiv rate limits the request"""
+        delay = 0.5
+        for attempt in range(ARXIV_DOWNLOAD_RETRIES):
+            try:
+                await asyncio.to_thread(paper.download_pdf, dirpath=self.storage_path, filename=pdf_filename(paper_id))
+                return
+            except Exception as e:
+                message = str(e).lower()
+                if attempt == ARXIV_DOWNLOAD_RETRIES - 1 or not any(marker in message for marker in RATE_LIMIT_MARKERS):
+                    raise
+                logger.warning(f"Rate limited downloading {paper_id}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay + random.random() * delay)
+                delay *= 2
+    
+    def _cache_paper_content(self, paper_id: str, paper: Any) -> PaperRecord:
+        """Build the read_paper content for fetched metadata and cache it for later reads"""
+        # For now, return metadata and abstract
+        # In a full implementation, you'd extract text from the PDF
+        paper_record = PaperRecord(
+            paper_id=paper_id,
+            title=paper.title,
+            authors=tuple(str(author) for author in paper.authors),
+            abstract=paper.summary,
+            categories=tuple(paper.categories),
+            published=paper.published.isoformat() if paper.published else "",
+            content=f"Abstract: {paper.summary}\n\n[Full PDF content extraction would require additional PDF processing libraries]"
+        )
+        self.paper_cache.set(paper_id, paper_record)
+        return paper_record
+    
     async def read_paper(self, paper_id: str) -> ArxivResult:
         """Read the content of a downloaded paper"""
         try:
             import arxiv
             
-            # First get the paper metadata
-            search = arxiv.Search(id_list=[paper_id])
-            client = arxiv.Client()
-            paper = next(client.results(search), None)
+            paper_record = self.paper_cache.get(paper_id)
+            if paper_record is None:
+                # First get the paper metadata
+                search = arxiv.Search(id_list=[paper_id])
+                client = self._get_client()
+                paper = await asyncio.to_thread(next, client.results(search), None)
+                
+                if not paper:
+                    return ArxivResult(
+                        success=False,
+                        data=None,
+                        error=f"Paper {paper_id} not found"
+                    )
+                
+                paper_record = self._cache_paper_content(paper_id, paper)
             
-            if not paper:
-                return ArxivResult(
-                    success=False,
-                    data=None,
-                    error=f"Paper {paper_id} not found"
-                )
+            # Check if PDF exists; this can change after the metadata is cached, so it is never cached itself
+            pdf_path = os.path.join(self.storage_path, pdf_filename(paper_id))
             
-            # Check if PDF exists
-            pdf_path = os.path.join(self.storage_path, f"{paper_id}.pdf")
-            
-            # For now, return metadata and abstract
-            # In a full implementation, you'd extract text from the PDF
-            paper_content = {
-                "paper_id": paper_id,
-                "title": paper.title,
-                "authors": [str(author) for author in paper.authors],
-                "abstract": paper.summary,
-                "content": f"Abstract: {paper.summary}\n\n[Full PDF content extraction would require additional PDF processing libraries]",
-                "categories": paper.categories,
-                "published": paper.published.isoformat() if paper.published else "",
-                "pdf_path": pdf_path if os.path.exists(pdf_path) else None
-            }
-            
-            return ArxivResult(success=True, data=paper_content)
+            return ArxivResult(success=True, data=paper_record.to_dict(pdf_path if os.path.exists(pdf_path) else None))
             
         except ImportError:
             return ArxivResult(
@@ -167,7 +367,8 @@ class SimpleArxivClient:
             if os.path.exists(self.storage_path):
                 for filename in os.listdir(self.storage_path):
                     if filename.endswith('.pdf'):
-                        paper_id = filename.replace('.pdf', '')
+                        # ArXiv IDs never contain "_", so this reverses pdf_filename
+                        paper_id = filename.replace('.pdf', '').replace('_', '/')
                         papers.append({
                             "paper_id": paper_id,
                             "filename": filename,
@@ -204,14 +405,19 @@ class SimpleResearchAgent:
             
             papers = search_result.data.get("papers", [])
             
-            # Download top papers
-            downloaded_papers = []
-            for paper in papers:  # Download all papers
-                paper_id = paper.get("id", "")
+            # Download all papers with one metadata lookup and concurrent PDF downloads
+            paper_ids = []
+            for paper in papers:
+                paper_id = extract_arxiv_id(paper.get("id", ""))
                 if paper_id:
-                    download_result = await self.arxiv_client.download_paper(paper_id)
-                    if download_result.success:
-                        downloaded_papers.append(paper_id)
+                    paper_ids.append(paper_id)
+                else:
+                    logger.warning(f"Skipping paper without a valid arXiv ID: {paper.get('id', '')!r}")
+            download_results = await self.arxiv_client.download_papers(paper_ids)
+            downloaded_papers = [
+                paper_id for paper_id, download_result in zip(paper_ids, download_results)
+                if download_result.success
+            ]
             
             return {
                 "topic": topic,
@@ -229,30 +435,26 @@ class SimpleResearchAgent:
                 "papers": []
             }
     
-    async def analyze_paper(self, paper_id: str) -> Dict[str, Any]:
-        """Analyze a specific paper"""
+    async def analyze_paper(self, paper_id: str, include_content: bool = False) -> Dict[str, Any]:
+        """Analyze a specific paper, leaving out the full content unless include_content is set"""
+        return (await self.analyze_papers([paper_id], include_content))[0]
+    
+    async def analyze_papers(self, paper_ids: List[str], include_content: bool = False) -> List[Dict[str, Any]]:
+        """Analyze several papers, downloading them concurrently and reading each as soon as it is downloaded"""
         try:
-            # First download the paper if not already downloaded
-            download_result = await self.arxiv_client.download_paper(paper_id)
-            if not download_result.success:
-                return {
-                    "paper_id": paper_id,
-                    "error": f"Failed to download paper: {download_result.error}"
-                }
-            
-            # Read the paper content
-            read_result = await self.arxiv_client.read_paper(paper_id)
-            if not read_result.success:
-                return {
-                    "paper_id": paper_id,
-                    "error": f"Failed to read paper: {read_result.error}"
-                }
+            results = await self.arxiv_client.download_and_read_papers(paper_ids)
             
-            return read_result.data
+            analyzed_papers = []
+            for paper_id, result in zip(paper_ids, results):
+                if not result.success:
+                    analyzed_papers.append({"paper_id": paper_id, "error": result.error})
+                # Metadata and abstract are enough for most callers; the body is only carried when asked for
+                elif not include_content:
+                    analyzed_papers.append({key: value for key, value in result.data.items() if key != "content"})
+                else:
+                    analyzed_papers.append(result.data)
+            return analyzed_papers
             
         except Exception as e:
-            logger.error(f"Error analyzing paper {paper_id}: {str(e)}")
-            return {
-                "paper_id": paper_id,
-                "error": str(e)
-            }
\ No newline at end of file
+            logger.error(f"Error analyzing papers {', '.join(paper_ids)}: {str(e)}")
+            return [{"paper_id": paper_id, "error": str(e)} for paper_id in paper_ids]
@@ -1,8 +1,8 @@
-from collections import OrderedDict
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta
 import threading
 from uuid import uuid4
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
 
 class LRUCache:
     def __init__(self, expiry_minutes: int = 15):
@@ -63,3 +63,94 @@ class LRUCache:
         """Remove all entries from cache"""
         with self._lock:
             self._cache.clear()
+
+
+class TTLCache:
+    """Thread-safe bounded LRU cache whose entries expire after a fixed time"""
+
+    def __init__(self, max_size: int = 1024, expiry_minutes: int = 60):
+        self._cache: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._expiry_delta = timedelta(minutes=expiry_minutes)
+
+    def _is_expired(self, timestamp: datetime) -> bool:
+        return datetime.now() - timestamp > self._expiry_delta
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._cache:
+                return default
+
+            value, timestamp = self._cache[key]
+
+            if self._is_expired(timestamp):
+                del self._cache[key]
+                return default
+
+            # Move to end to mark as recently used
+            self._cache.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._cache[key] = (value, datetime.now())
+            self._cache.move_to_end(key)
+
+            # Evict least recently used entries beyond the size limit
+            while len(self._cache) > self._max_size:
+                self._cache.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries from cache"""
+        with self._lock:
+            self._cache.clear()
+
+
+class SemanticCache:
+    """Thread-safe bounded cache that returns the value stored for the most similar embedding above a threshold"""
+
+    def __init__(self, max_size: int = 512, expiry_minutes: int = 60, threshold: float = 0.95):
+        # Imported here so numpy is only loaded when a semantic cache is actually used
+        import numpy
+        self._np = numpy
+        self._entries: deque = deque()
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._expiry_delta = timedelta(minutes=expiry_minutes)
+        self._threshold = threshold
+
+    def _is_expired(self, timestamp: datetime) -> bool:
+        return datetime.now() - timestamp > self._expiry_delta
+
+    def _normalize(self, vector: Sequence[float]) -> Any:
+        array = self._np.asarray(vector, dtype=self._np.float32)
+        norm = self._np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def get(self, vector: Sequence[float], namespace: Hashable = None, default: Any = None) -> Any:
+        with self._lock:
+            # Entries are appended in time order, so expired ones are always at the front
+            while self._entries and self._is_expired(self._entries[0][3]):
+                self._entries.popleft()
+
+            candidates = [entry for entry in self._entries if entry[0] == namespace]
+            if not candidates:
+                return default
+
+            scores = self._np.stack([entry[1] for entry in candidates]) @ self._normalize(vector)
+            best = int(self._np.argmax(scores))
+            if scores[best] < self._threshold:
+                return default
+            return candidates[best][2]
+
+    def set(self, vector: Sequence[float], value: Any, namespace: Hashable = None) -> None:
+        with self._lock:
+            self._entries.append((namespace, self._normalize(vector), value, datetime.now()))
+            while len(self._entries) > self._max_size:
+                self._entries.popleft()
+
+    def clear(self) -> None:
+        """Remove all entries from cache"""
+        with self._lock:
+            self._entries.clear()
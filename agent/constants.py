@@ -1,4 +1,19 @@
 PROJECT_NAME = "research_learner"
 AGENT_NAME = "research_agent"
 SPAN_TYPE = "agent"
-MAX_CONTENT_LENGTH = 100000
\ No newline at end of file
+MAX_CONTENT_LENGTH = 100000
+MAX_MESSAGE_HISTORY = 100
+PAPER_INSERT_WORKERS = 4
+MAX_TOOL_RESULT_LENGTH = 4000
+LLM_MAX_CONNECTIONS = 64
+LLM_MAX_KEEPALIVE_CONNECTIONS = 32
+LLM_TIMEOUT_SECONDS = 60
+LLM_MAX_CONCURRENCY = 32
+MAX_AGENT_HISTORY = 20
+MAX_TOOL_ITERATIONS = 6
+TOOL_TIMEOUT_SECONDS = 60
+KNOWLEDGE_TOOL_WORKERS = 8
+MAX_TOOL_RESULT_TOKENS = 1000
+COMPILE_TOOL_RESULTS_TOKENS = 6000
+ARXIV_DOWNLOAD_CONCURRENCY = 4
+ARXIV_DOWNLOAD_RETRIES = 5
@@ -8,6 +8,10 @@ document.addEventListener('DOMContentLoaded', function() {
     const userIdInput = document.getElementById('user-id-input');
     const limitInput = document.getElementById('limit-input');
     
+    // Bot message being filled in by streamed response tokens
+    let streamingMessage = null;
+    let streamingText = '';
+    
     // Add welcome message
     addMessageToChat("Hello! I'm your research assistant. I can help you find and analyze academic papers, query knowledge, and answer questions. Select an endpoint and try it out!", 'bot-message');
     
@@ -141,6 +145,9 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Send to agent with streaming
     function sendToAgentStream(message, conversationHash, requestTimestamp, startTime) {
+        streamingMessage = null;
+        streamingText = '';
+        
         // Add progress indicator
         const progressIndicator = createProgressIndicator();
         chatMessages.appendChild(progressIndicator);
@@ -315,9 +322,25 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Handle stream events
     function handleStreamEvent(data, progressIndicator) {
-        console.log('Received stream event:', data.type, data);
+        if (data.type !== 'token') {
+            console.log('Received stream event:', data.type, data);
+        }
         
         switch (data.type) {
+            case 'token':
+                // Show the response as it is generated, replacing the progress indicator with the message
+                if (!streamingMessage) {
+                    if (progressIndicator && progressIndicator.parentNode) {
+                        progressIndicator.remove();
+                    }
+                    streamingMessage = document.createElement('div');
+                    streamingMessage.className = 'message bot-message';
+                    chatMessages.appendChild(streamingMessage);
+                }
+                streamingText += data.content;
+                streamingMessage.textContent = streamingText;
+                break;
+                
             case 'status':
                 updateProgressIndicator(progressIndicator, data.message, 1, 5);
                 break;
@@ -344,8 +367,13 @@ document.addEventListener('DOMContentLoaded', function() {
                 console.log('Chat messages element:', chatMessages);
                 console.log('Current chat messages count:', chatMessages.children.length);
                 
-                // Add the response message
-                if (data.response && data.response.trim() !== '') {
+                // Add the response message, or swap the streamed text for the formatted final response
+                if (streamingMessage && data.response && data.response.trim() !== '') {
+                    streamingMessage.innerHTML = formatMarkdown(data.response);
+                    streamingMessage = null;
+                    streamingText = '';
+                    console.log('Streamed response finalized');
+                } else if (data.response && data.response.trim() !== '') {
                     addMessageToChat(data.response, 'bot-message');
                     console.log('Response message added successfully');
                 } else {
@@ -2,8 +2,11 @@ from typing import Dict, List, Any, Optional, Union
 import logging
 import os
 from datetime import datetime
-import json
-from agent.constants import MAX_CONTENT_LENGTH
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from agent.constants import MAX_CONTENT_LENGTH, PAPER_INSERT_WORKERS
+from agent.caching import TTLCache
+from agent.arxiv_client import extract_arxiv_id
 
 logger = logging.getLogger("knowledge_graph")
 
@@ -13,6 +16,10 @@ class KnowledgeGraphManager:
     
     def __init__(self):
         self.memory = None
+        # ArXiv search results keyed on the normalized topic, so repeated topics don't re-hit the API
+        self.arxiv_search_cache = TTLCache(max_size=256, expiry_minutes=60)
+        # Created on first search and reused so the HTTP session to ArXiv is kept alive
+        self.arxiv_client = None
         self._initialize_memory()
     
     def _initialize_memory(self):
@@ -83,28 +90,7 @@ class KnowledgeGraphManager:
         try:
             # Create comprehensive paper description
             paper_text = self._format_paper_for_storage(paper_data)
-            
-            # Add to memory with metadata (flatten complex types for ChromaDB)
-            metadata = {
-                "type": "research_paper",
-                "arxiv_id": paper_data.get("paper_id", ""),
-                "title": paper_data.get("title", ""),
-                "published": paper_data.get("published", ""),
-                "added_date": datetime.now().isoformat()
-            }
-            
-            # Convert list fields to comma-separated strings for ChromaDB
-            authors = paper_data.get("authors", [])
-            if isinstance(authors, list):
-                metadata["authors"] = ", ".join(str(author) for author in authors)
-            else:
-                metadata["authors"] = str(authors)
-                
-            categories = paper_data.get("categories", [])
-            if isinstance(categories, list):
-                metadata["categories"] = ", ".join(str(cat) for cat in categories)
-            else:
-                metadata["categories"] = str(categories)
+            metadata = self._format_paper_metadata(paper_data)
             
             result = self.memory.add(paper_text, user_id="default", metadata=metadata)
             logger.info(f"Added paper to knowledge graph: {paper_data.get('title', 'Unknown')}")
@@ -115,6 +101,23 @@ class KnowledgeGraphManager:
             logger.error(f"Error adding paper to knowledge graph: {str(e)}")
             return False
     
+    def add_research_papers(self, papers: List[Dict[str, Any]]) -> int:
+        """Add several research papers to the knowledge graph in one call, returning how many were stored"""
+        if not self.memory:
+            logger.error("Memory not initialized")
+            return 0
+        
+        if not papers:
+            return 0
+        
+        # mem0 has no bulk insert, so overlap the per-paper extraction and embedding round trips
+        with ThreadPoolExecutor(max_workers=min(len(papers), PAPER_INSERT_WORKERS)) as executor:
+            results = list(executor.map(self.add_research_paper, papers))
+        
+        added = sum(1 for success in results if success)
+        logger.info(f"Added {added}/{len(papers)} papers to knowledge graph")
+        return added
+    
     def add_research_insight(self, insight: str, topic: str, paper_ids: Optional[List[str]] = None, context: Dict[str, Any] = {}) -> bool:
         """Add a research insight to the knowledge graph"""
         if not self.memory:
@@ -136,7 +139,7 @@ class KnowledgeGraphManager:
             
             # Add context as flat key-value pairs with string values only
             if context:
-                insight_text += f"\n\nContext: {json.dumps(context, indent=2)}\n\nPaper IDs: {paper_ids}"
+                insight_text += f"\n\nContext: {orjson.dumps(context, default=str).decode()}\n\nPaper IDs: {paper_ids}"
                 for key, value in context.items():
                     # Convert all values to strings for ChromaDB compatibility
                     safe_key = f"context_{key}"
@@ -146,7 +149,7 @@ class KnowledgeGraphManager:
                         metadata[safe_key] = "None"
                     else:
                         # Convert complex types to JSON strings
-                        metadata[safe_key] = json.dumps(value)
+                        metadata[safe_key] = orjson.dumps(value, default=str).decode()
             
             result = self.memory.add(insight_text, user_id="default", metadata=metadata)
             logger.info(f"Added research insight for topic: {topic}")
@@ -218,7 +221,7 @@ class KnowledgeGraphManager:
             for result in memory_results:
                 try:
                     if isinstance(result, str):
-                        result = json.loads(result)
+                        result = orjson.loads(result)
                     elif isinstance(result, dict):
                         pass
                     else:
@@ -241,38 +244,55 @@ class KnowledgeGraphManager:
                 
             # If we don't have enough papers in memory, search ArXiv
             if len(papers) < limit:
-                try:
-                    import arxiv
-                    search = arxiv.Search(
-                        query=topic,
-                        max_results=limit - len(papers),
-                        sort_by=arxiv.SortCriterion.Relevance
-                    )
-                    client = arxiv.Client()
-                    
-                    for result in client.results(search):
-                        papers.append({
-                            "title": result.title,
-                            "authors": [str(author) for author in result.authors],
-                            "arxiv_id": result.entry_id.split("/")[-1],
-                            "categories": result.categories,
-                            "relevance_score": 1.0,  # ArXiv results don't have scores
-                            "content": result.summary,
-                            "source": "arxiv_search"
-                        })
-                        
-                except ImportError:
-                    logger.warning("arxiv library not available for searching additional papers")
-                except Exception as e:
-                    logger.error(f"Error searching ArXiv for additional papers: {str(e)}")
-                
-                logger.info(f"Found {len(papers)} related papers for topic: {topic}")
-                return papers[:limit]  # Ensure we don't exceed the limit
+                papers.extend(self._search_arxiv(topic, limit - len(papers)))
+            
+            logger.info(f"Found {len(papers)} related papers for topic: {topic}")
+            return papers[:limit]  # Ensure we don't exceed the limit
             
         except Exception as e:
             logger.error(f"Error getting related papers: {str(e)}")
             return []
     
+    def _search_arxiv(self, topic: str, max_results: int) -> List[Dict[str, Any]]:
+        """Search ArXiv for papers on a topic, reusing recent results for the same topic"""
+        cache_key = (" ".join(topic.lower().split()), max_results)
+        cached_papers = self.arxiv_search_cache.get(cache_key)
+        if cached_papers is not None:
+            logger.info(f"ArXiv search cache hit for topic: {topic}")
+            return list(cached_papers)
+        
+        try:
+            import arxiv
+            search = arxiv.Search(
+                query=topic,
+                max_results=max_results,
+                sort_by=arxiv.SortCriterion.Relevance
+            )
+            if self.arxiv_client is None:
+                self.arxiv_client = arxiv.Client()
+            client = self.arxiv_client
+            
+            papers = []
+            for result in client.results(search):
+                papers.append({
+                    "title": result.title,
+                    "authors": [str(author) for author in result.authors],
+                    "arxiv_id": extract_arxiv_id(result.entry_id) or result.get_short_id(),
+                    "categories": result.categories,
+                    "relevance_score": 1.0,  # ArXiv results don't have scores
+                    "content": result.summary,
+                    "source": "arxiv_search"
+                })
+            
+            self.arxiv_search_cache.set(cache_key, papers)
+            return list(papers)
+            
+        except ImportError:
+            logger.warning("arxiv library not available for searching additional papers")
+        except Exception as e:
+            logger.error(f"Error searching ArXiv for additional papers: {str(e)}")
+        return []
+    
     def get_research_insights(self, topic: str, limit: int = 10) -> List[Dict[str, Any]]:
         """Get research insights for a specific topic"""
         if not self.memory:
@@ -321,7 +341,7 @@ class KnowledgeGraphManager:
             for result in results:
                 try:
                     if isinstance(result, str):
-                        result = json.loads(result)
+                        result = orjson.loads(result)
                     elif isinstance(result, dict):
                         pass
                     else:
@@ -364,7 +384,7 @@ class KnowledgeGraphManager:
             memories = self.memory.get_all(user_id="default", limit=limit)
             formatted_memories = []
             for memory in memories:
-                memory = json.loads(memory)
+                memory = orjson.loads(memory)
                 formatted_memories.append({
                     "id": memory.get("id", ""),
                     "content": memory.get("memory", ""),
@@ -407,6 +427,31 @@ class KnowledgeGraphManager:
             logger.error(f"Error updating memory: {str(e)}")
             return False
     
+    def _format_paper_metadata(self, paper_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the metadata stored with a paper (flatten complex types for ChromaDB)"""
+        metadata = {
+            "type": "research_paper",
+            "arxiv_id": paper_data.get("paper_id", ""),
+            "title": paper_data.get("title", ""),
+            "published": paper_data.get("published", ""),
+            "added_date": datetime.now().isoformat()
+        }
+        
+        # Convert list fields to comma-separated strings for ChromaDB
+        authors = paper_data.get("authors", [])
+        if isinstance(authors, list):
+            metadata["authors"] = ", ".join(str(author) for author in authors)
+        else:
+            metadata["authors"] = str(authors)
+            
+        categories = paper_data.get("categories", [])
+        if isinstance(categories, list):
+            metadata["categories"] = ", ".join(str(cat) for cat in categories)
+        else:
+            metadata["categories"] = str(categories)
+        
+        return metadata
+    
     def _format_paper_for_storage(self, paper_data: Dict[str, Any]) -> str:
         """Format paper data for storage in the knowledge graph"""
         title = paper_data.get("title", "Unknown Title")
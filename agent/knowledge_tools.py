@@ -3,15 +3,151 @@ Async tool wrappers for knowledge graph functions to be used by LangGraph agent
 """
 
 import asyncio
-import json
+import contextvars
+import functools
 import logging
-from typing import Dict, List, Any, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Any, Optional, Set, Tuple, Union
 from langchain_core.tools import BaseTool
+import orjson
 from pydantic import BaseModel, Field
 from agent.knowledge_graph import get_knowledge_graph_manager
+from agent.caching import TTLCache
+from agent.constants import KNOWLEDGE_TOOL_WORKERS
 
 logger = logging.getLogger("knowledge_tools")
 
+# Dedicated pool for blocking knowledge graph calls so they can't starve (or be starved by) the default executor
+_kg_executor = ThreadPoolExecutor(max_workers=KNOWLEDGE_TOOL_WORKERS, thread_name_prefix="knowledge_tools")
+
+
+async def _run_blocking(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a blocking knowledge graph call on the dedicated pool, keeping the caller's context for tracing"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_kg_executor, functools.partial(context.run, func, *args))
+
+
+# Tools that only read the knowledge graph, so identical calls can share results
+READ_ONLY_TOOLS = frozenset({"search_knowledge", "get_related_papers", "get_research_insights", "get_knowledge_summary"})
+
+# Read-only tools whose results each knowledge graph write can change
+WRITE_INVALIDATES = {
+    "add_research_paper": ("search_knowledge", "get_related_papers", "get_knowledge_summary"),
+    "add_research_papers": ("search_knowledge", "get_related_papers", "get_knowledge_summary"),
+    "add_research_insight": ("search_knowledge", "get_research_insights", "get_knowledge_summary"),
+}
+
+# Read-only tool results per tool, keyed on the arguments; a write clears only the tools it affects
+_tool_caches = {name: TTLCache(max_size=1024, expiry_minutes=10) for name in READ_ONLY_TOOLS}
+# Bumped per tool on every invalidation, so reads that started before a write don't cache stale results
+_tool_generations = dict.fromkeys(READ_ONLY_TOOLS, 0)
+_inflight_tool_calls: Dict[Tuple[str, bytes, int], asyncio.Future] = {}
+_CACHE_MISS = object()
+
+# Knowledge graph writes run in the background so they don't hold up the agent; this set keeps them referenced
+_pending_writes: Set[asyncio.Task] = set()
+# Writes scheduled by the current run, so a run only waits for its own writes in wait_for_pending_writes
+_run_writes: contextvars.ContextVar[Optional[Set[asyncio.Task]]] = contextvars.ContextVar("run_writes", default=None)
+
+
+def _schedule_write(func: Callable[..., Any], *args: Any, expected: Any = True) -> None:
+    """Run a blocking knowledge graph write in a background thread without awaiting it.
+
+    The knowledge graph methods report failure through their return value rather than raising,
+    so anything other than `expected` is logged as a failed write.
+    """
+    task = asyncio.create_task(_run_blocking(func, *args))
+    _pending_writes.add(task)
+    task.add_done_callback(functools.partial(_on_write_done, func.__name__, expected))
+    _invalidate_tool_cache(func.__name__)
+    run_writes = _run_writes.get()
+    if run_writes is not None:
+        run_writes.add(task)
+        task.add_done_callback(run_writes.discard)
+
+
+def _write_now(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a knowledge graph write on the calling thread, for sync callers with no event loop to leave it running on"""
+    try:
+        return func(*args)
+    finally:
+        _invalidate_tool_cache(func.__name__)
+
+
+def _write_status(stored: bool, **details: Any) -> Dict[str, Any]:
+    """Tool result for a write that has finished"""
+    return {"status": "stored" if stored else "failed", **details}
+
+
+def _on_write_done(name: str, expected: Any, task: asyncio.Task) -> None:
+    """Drop a finished write from the pending set and log failures"""
+    _pending_writes.discard(task)
+    # Lookups cached while the write was in flight may be missing the new knowledge
+    _invalidate_tool_cache(name)
+    if task.cancelled():
+        logger.warning(f"Background knowledge graph write {name} was cancelled")
+    elif task.exception() is not None:
+        logger.error(f"Background knowledge graph write {name} failed: {str(task.exception())}")
+    elif task.result() != expected:
+        logger.error(f"Background knowledge graph write {name} failed: returned {task.result()!r}, expected {expected!r}")
+
+
+def _invalidate_tool_cache(write_name: str) -> None:
+    """Drop cached results of the read-only tools a write affects and mark their in-flight reads as stale"""
+    for name in WRITE_INVALIDATES.get(write_name, READ_ONLY_TOOLS):
+        _tool_generations[name] += 1
+        _tool_caches[name].clear()
+
+
+def track_run_writes() -> None:
+    """Start a fresh set of tracked writes for the run in the current context.
+
+    Graph nodes run in tasks that copy this context, so writes they schedule land in the same set.
+    """
+    _run_writes.set(set())
+
+
+async def wait_for_pending_writes() -> None:
+    """Wait for the knowledge graph writes scheduled by the current run to finish"""
+    run_writes = _run_writes.get()
+    if run_writes:
+        await asyncio.gather(*list(run_writes), return_exceptions=True)
+
+
+async def invoke_tool_cached(tool: BaseTool, args: Dict[str, Any]) -> Any:
+    """Invoke a tool, serving repeated read-only calls from cache and sharing identical calls already in flight"""
+    if tool.name not in READ_ONLY_TOOLS:
+        return await tool.ainvoke(args)
+    
+    args_key = orjson.dumps(args, option=orjson.OPT_SORT_KEYS, default=str)
+    cached_result = _tool_caches[tool.name].get(args_key, _CACHE_MISS)
+    if cached_result is not _CACHE_MISS:
+        logger.info(f"Tool cache hit: {tool.name}")
+        return cached_result
+    
+    # Calls started before the latest write are not shared with calls made after it
+    generation = _tool_generations[tool.name]
+    inflight_key = (tool.name, args_key, generation)
+    inflight = _inflight_tool_calls.get(inflight_key)
+    if inflight is None:
+        inflight = asyncio.ensure_future(_invoke_and_cache(tool, args, args_key, generation))
+        _inflight_tool_calls[inflight_key] = inflight
+        inflight.add_done_callback(lambda _: _inflight_tool_calls.pop(inflight_key, None))
+    
+    # Shield so one cancelled caller doesn't cancel the call for everyone sharing it
+    return await asyncio.shield(inflight)
+
+
+async def _invoke_and_cache(tool: BaseTool, args: Dict[str, Any], args_key: bytes, generation: int) -> Any:
+    """Invoke a read-only tool and cache its result, unless a write invalidated the tool while it ran"""
+    result = await tool.ainvoke(args)
+    
+    # Tools report failures as {"error": ...} rather than raising; don't keep those around
+    if _tool_generations[tool.name] == generation and not (isinstance(result, dict) and "error" in result):
+        _tool_caches[tool.name].set(args_key, result)
+    return result
+
 
 # Input schemas for tools
 class SearchKnowledgeInput(BaseModel):
@@ -37,6 +173,11 @@ class AddResearchPaperInput(BaseModel):
     paper_data: Dict[str, Any] = Field(description="Research paper data to store")
 
 
+class AddResearchPapersInput(BaseModel):
+    """Input for adding several research papers at once"""
+    papers: List[Dict[str, Any]] = Field(description="List of research paper data to store")
+
+
 class AddResearchInsightInput(BaseModel):
     """Input for adding a research insight"""
     insight: str = Field(description="The research insight content")
@@ -67,13 +208,8 @@ class SearchKnowledgeTool(BaseTool):
             logger.info(f"Executing search_knowledge tool: query='{query}', limit={limit}")
             
             # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
             kg_manager = get_knowledge_graph_manager()
-            
-            def search_sync():
-                return kg_manager.search_knowledge(query, limit)
-            
-            results = await loop.run_in_executor(None, search_sync)
+            results = await _run_blocking(kg_manager.search_knowledge, query, limit)
             
             logger.info(f"search_knowledge tool completed: found {len(results)} results")
             return results
@@ -99,13 +235,8 @@ class GetRelatedPapersTool(BaseTool):
             logger.info(f"Executing get_related_papers tool: topic='{topic}', limit={limit}")
             
             # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
             kg_manager = get_knowledge_graph_manager()
-            
-            def get_papers_sync():
-                return kg_manager.get_related_papers(topic, limit)
-            
-            results = await loop.run_in_executor(None, get_papers_sync)
+            results = await _run_blocking(kg_manager.get_related_papers, topic, limit)
             
             if results:
                 logger.info(f"get_related_papers tool completed: found {len(results)} papers")
@@ -135,13 +266,8 @@ class GetResearchInsightsTool(BaseTool):
             logger.info(f"Executing get_research_insights tool: topic='{topic}', limit={limit}")
             
             # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
             kg_manager = get_knowledge_graph_manager()
-            
-            def get_insights_sync():
-                return kg_manager.get_research_insights(topic, limit)
-            
-            results = await loop.run_in_executor(None, get_insights_sync)
+            results = await _run_blocking(kg_manager.get_research_insights, topic, limit)
             
             logger.info(f"get_research_insights tool completed: found {len(results)} insights")
             return results
@@ -157,31 +283,64 @@ class AddResearchPaperTool(BaseTool):
     description: str = "Add a research paper to the knowledge graph for future retrieval"
     args_schema: type = AddResearchPaperInput
 
-    def _run(self, paper_data: Dict[str, Any]) -> bool:
-        """Synchronous version (fallback)"""
-        return asyncio.run(self._arun(paper_data))
+    def _run(self, paper_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Synchronous version (fallback), which stores the paper before returning"""
+        try:
+            kg_manager = get_knowledge_graph_manager()
+            return _write_status(_write_now(kg_manager.add_research_paper, paper_data))
+        except Exception as e:
+            logger.error(f"Error in add_research_paper tool: {str(e)}")
+            return _write_status(False, error=str(e))
 
-    async def _arun(self, paper_data: Dict[str, Any]) -> bool:
+    async def _arun(self, paper_data: Dict[str, Any]) -> Dict[str, Any]:
         """Add research paper asynchronously"""
         try:
             paper_title = paper_data.get("title", "Unknown")
             logger.info(f"Executing add_research_paper tool: paper='{paper_title}'")
             
-            # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
+            # Store in the background; the agent doesn't need to wait for the write, so it is reported as pending
             kg_manager = get_knowledge_graph_manager()
+            _schedule_write(kg_manager.add_research_paper, paper_data)
+            
+            logger.info("add_research_paper tool completed: write scheduled")
+            return {"status": "pending"}
             
-            def add_paper_sync():
-                return kg_manager.add_research_paper(paper_data)
+        except Exception as e:
+            logger.error(f"Error in add_research_paper tool: {str(e)}")
+            return _write_status(False, error=str(e))
+
+
+class AddResearchPapersTool(BaseTool):
+    """Tool for adding several research papers to knowledge graph in one call"""
+    name: str = "add_research_papers"
+    description: str = "Add multiple research papers to the knowledge graph in a single call. Prefer this over repeated add_research_paper calls when storing more than one paper."
+    args_schema: type = AddResearchPapersInput
+
+    def _run(self, papers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Synchronous version (fallback), which stores the papers before returning"""
+        try:
+            kg_manager = get_knowledge_graph_manager()
+            stored = _write_now(kg_manager.add_research_papers, papers)
+            return _write_status(stored == len(papers), papers=stored)
+        except Exception as e:
+            logger.error(f"Error in add_research_papers tool: {str(e)}")
+            return _write_status(False, papers=0, error=str(e))
+
+    async def _arun(self, papers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Add research papers asynchronously"""
+        try:
+            logger.info(f"Executing add_research_papers tool: {len(papers)} papers")
             
-            success = await loop.run_in_executor(None, add_paper_sync)
+            # Store in the background; the agent doesn't need to wait for the writes
+            kg_manager = get_knowledge_graph_manager()
+            _schedule_write(kg_manager.add_research_papers, papers, expected=len(papers))
             
-            logger.info(f"add_research_paper tool completed: success={success}")
-            return success
+            logger.info(f"add_research_papers tool completed: {len(papers)} paper writes scheduled")
+            return {"status": "pending", "papers": len(papers)}
             
         except Exception as e:
-            logger.error(f"Error in add_research_paper tool: {str(e)}")
-            return False
+            logger.error(f"Error in add_research_papers tool: {str(e)}")
+            return _write_status(False, papers=0, error=str(e))
 
 
 class AddResearchInsightTool(BaseTool):
@@ -190,30 +349,30 @@ class AddResearchInsightTool(BaseTool):
     description: str = "Add a research insight to the knowledge graph for future retrieval. CALL THIS UP TO 3 TIMES - extract distinct insights from each paper set. Be comprehensive and detailed."
     args_schema: type = AddResearchInsightInput
 
-    def _run(self, insight: str, topic: str, paper_ids: Optional[List[str]] = None, context: Optional[Dict[str, Any]] = None) -> bool:
-        """Synchronous version (fallback)"""
-        return asyncio.run(self._arun(insight, topic, paper_ids or [], context or {}))
+    def _run(self, insight: str, topic: str, paper_ids: Optional[List[str]] = None, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Synchronous version (fallback), which stores the insight before returning"""
+        try:
+            kg_manager = get_knowledge_graph_manager()
+            return _write_status(_write_now(kg_manager.add_research_insight, insight, topic, paper_ids or [], context or {}))
+        except Exception as e:
+            logger.error(f"Error in add_research_insight tool: {str(e)}")
+            return _write_status(False, error=str(e))
 
-    async def _arun(self, insight: str, topic: str, paper_ids: Optional[List[str]] = None, context: Optional[Dict[str, Any]] = None) -> bool:
+    async def _arun(self, insight: str, topic: str, paper_ids: Optional[List[str]] = None, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Add research insight asynchronously"""
         try:
             logger.info(f"Executing add_research_insight tool: topic='{topic}'")
             
-            # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
+            # Store in the background; the agent doesn't need to wait for the write
             kg_manager = get_knowledge_graph_manager()
+            _schedule_write(kg_manager.add_research_insight, insight, topic, paper_ids or [], context or {})
             
-            def add_insight_sync():
-                return kg_manager.add_research_insight(insight, topic, paper_ids or [], context or {})
-            
-            success = await loop.run_in_executor(None, add_insight_sync)
-            
-            logger.info(f"add_research_insight tool completed: success={success}")
-            return success
+            logger.info("add_research_insight tool completed: write scheduled")
+            return {"status": "pending"}
             
         except Exception as e:
             logger.error(f"Error in add_research_insight tool: {str(e)}")
-            return False
+            return _write_status(False, error=str(e))
 
 
 class GetKnowledgeSummaryTool(BaseTool):
@@ -232,13 +391,8 @@ class GetKnowledgeSummaryTool(BaseTool):
             logger.info(f"Executing get_knowledge_summary tool: topic='{topic}'")
             
             # Run in thread pool to avoid blocking
-            loop = asyncio.get_event_loop()
             kg_manager = get_knowledge_graph_manager()
-            
-            def get_summary_sync():
-                return kg_manager.get_knowledge_summary(topic)
-            
-            results = await loop.run_in_executor(None, get_summary_sync)
+            results = await _run_blocking(kg_manager.get_knowledge_summary, topic)
             
             logger.info(f"get_knowledge_summary tool completed: {results.get('total_papers', 0)} papers, {results.get('total_insights', 0)} insights")
             return results
@@ -254,6 +408,7 @@ KNOWLEDGE_TOOLS = [
     GetRelatedPapersTool(),
     GetResearchInsightsTool(),
     AddResearchPaperTool(),
+    AddResearchPapersTool(),
     AddResearchInsightTool(),
     GetKnowledgeSummaryTool(),
 ]
@@ -1,26 +1,165 @@
-from typing import Dict, List, Any, Optional, TypedDict, Annotated
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
+from typing import Callable, Dict, List, Any, Optional, Tuple, TypedDict, Annotated, AsyncIterator
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage, trim_messages
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.graph import StateGraph, END, START
 from langgraph.graph.message import add_messages
 from langgraph.checkpoint.memory import MemorySaver
-from langgraph.prebuilt import ToolNode
-from agent.arxiv_client import SimpleResearchAgent
-from agent.knowledge_tools import get_knowledge_tools, get_knowledge_tool
+from langgraph.cache.memory import InMemoryCache
+from langgraph.types import CachePolicy
+from agent.knowledge_tools import get_knowledge_tools, get_knowledge_tool, invoke_tool_cached, track_run_writes, wait_for_pending_writes
 from agent.prompts import Prompts
+from agent.schema import IntentClassification
+from agent.caching import TTLCache, SemanticCache
+from agent.constants import (
+    PROJECT_NAME,
+    MAX_MESSAGE_HISTORY,
+    MAX_AGENT_HISTORY,
+    MAX_TOOL_ITERATIONS,
+    TOOL_TIMEOUT_SECONDS,
+    MAX_TOOL_RESULT_LENGTH,
+    MAX_TOOL_RESULT_TOKENS,
+    COMPILE_TOOL_RESULTS_TOKENS,
+    LLM_MAX_CONNECTIONS,
+    LLM_MAX_KEEPALIVE_CONNECTIONS,
+    LLM_TIMEOUT_SECONDS,
+    LLM_MAX_CONCURRENCY
+)
 import asyncio
+import functools
+import hashlib
+import httpx
 import logging
 import os
 from dotenv import load_dotenv
-import json
+import orjson
+import re
+import weakref
 
 load_dotenv()
 logger = logging.getLogger("langgraph_agent")
 
+# Environment settings, read once at import
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1")
+OPENAI_INTENT_MODEL = os.getenv("OPENAI_INTENT_MODEL", "gpt-4.1-mini")
+OPENAI_TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", 0.1))
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB")
+REDIS_URL = os.getenv("REDIS_URL")
+INTENT_SEMANTIC_CACHE = os.getenv("INTENT_SEMANTIC_CACHE", "false").lower() == "true"
+INTENT_EMBEDDING_MODEL = os.getenv("INTENT_EMBEDDING_MODEL", "text-embedding-3-small")
+
+# OpenAI caches prompt prefixes automatically; a stable key per prompt routes requests sharing a prefix to the same cache
+INTENT_CACHE_KEY = {"prompt_cache_key": f"{PROJECT_NAME}-intent"}
+AGENT_CACHE_KEY = {"prompt_cache_key": f"{PROJECT_NAME}-agent"}
+RESPONSE_CACHE_KEY = {"prompt_cache_key": f"{PROJECT_NAME}-response"}
+
+# Rough characters per token, used to budget tool results when the tokenizer can't be loaded
+CHARS_PER_TOKEN = 4
+
+# Greetings and other short chit-chat that can be classified as "general" without an LLM call
+SMALL_TALK_PATTERN = re.compile(
+    r"^\W*(?:(?:hi|hello|hey|hiya|greetings|thanks|thank you|thx|bye|goodbye|"
+    r"good (?:morning|afternoon|evening)|how are you|who are you|what can you do|how can you help(?: me)?)"
+    r"(?:\s+(?:there|again|so much|a lot|today|doing))*\W*)+$",
+    re.IGNORECASE
+)
+# Default tool set for each intent, matching the intent detection prompt; used when the suggested tools are unusable
+INTENT_TOOLS = {
+    "research": ("search_knowledge", "get_related_papers", "add_research_papers", "add_research_insight"),
+    "analysis": ("search_knowledge", "get_related_papers", "add_research_papers", "add_research_insight"),
+    "knowledge_query": ("search_knowledge", "get_research_insights", "get_knowledge_summary"),
+    "general": ("search_knowledge",),
+}
+
+@functools.lru_cache(maxsize=1)
+def _token_encoding() -> Optional[Any]:
+    """Load the tokenizer for the configured model on first use, or None if it can't be loaded (e.g. offline)"""
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(OPENAI_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable, estimating tokens from characters: {str(e)}")
+        return None
+
+async def load_token_encoding() -> None:
+    """Load the tokenizer in a worker thread; the first load can download its BPE file and must not block the event loop"""
+    if not _token_encoding.cache_info().currsize:
+        await asyncio.to_thread(_token_encoding)
+
+def _loaded_token_encoding() -> Optional[Any]:
+    """Get the tokenizer if it has already been loaded, without loading it on the calling thread"""
+    if not _token_encoding.cache_info().currsize:
+        return None
+    return _token_encoding()
+
+def truncate_to_tokens(text: str, max_tokens: int) -> Tuple[str, int]:
+    """Cut text to at most max_tokens tokens, returning the (possibly truncated) text and its token count.
+
+    Falls back to a character estimate until the tokenizer has been loaded with load_token_encoding.
+    """
+    encoding = _loaded_token_encoding()
+    if encoding is None:
+        token_count = -(-len(text) // CHARS_PER_TOKEN)
+        if token_count <= max_tokens:
+            return text, token_count
+        return text[:max_tokens * CHARS_PER_TOKEN] + "...", max_tokens
+    
+    # Tool output can contain special-token text such as "<|endoftext|>"; treat it as ordinary text
+    token_ids = encoding.encode(text, disallowed_special=())
+    if len(token_ids) <= max_tokens:
+        return text, len(token_ids)
+    return encoding.decode(token_ids[:max_tokens]) + "...", max_tokens
+
+def count_tokens(text: str) -> int:
+    """Count the tokens in text, estimating from its length if the tokenizer isn't loaded"""
+    encoding = _loaded_token_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+SMALL_TALK_INTENT = {
+    "intent": "general",
+    "topic": "",
+    "suggested_tools": [],
+    "instructions": "Respond directly to the user."
+}
+
+def add_messages_bounded(left: List[BaseMessage], right: List[BaseMessage]) -> List[BaseMessage]:
+    """add_messages reducer that only keeps the most recent MAX_MESSAGE_HISTORY messages.
+
+    The window always starts on a human message so tool calls are never separated from their results.
+    """
+    merged = add_messages(left, right)
+    if len(merged) <= MAX_MESSAGE_HISTORY:
+        return merged
+    trimmed = trim_messages(
+        merged,
+        max_tokens=MAX_MESSAGE_HISTORY,
+        token_counter=len,
+        strategy="last",
+        start_on="human"
+    )
+    # A single turn larger than the window has no human message to start on, keep it whole
+    return trimmed or merged
+
+def _for_running_loop(primitives: weakref.WeakKeyDictionary, factory: Callable[[], Any]) -> Any:
+    """Get the asyncio primitive for the running event loop, creating it on first use.
+
+    The agent is a process-wide singleton, and a semaphore or lock used from a second loop fails with
+    "bound to a different event loop", e.g. when scripts or tests call asyncio.run more than once.
+    """
+    loop = asyncio.get_running_loop()
+    primitive = primitives.get(loop)
+    if primitive is None:
+        primitive = primitives[loop] = factory()
+    return primitive
+
 class AgentState(TypedDict):
     """State for the LangGraph agent"""
-    messages: Annotated[List[BaseMessage], add_messages]
+    messages: Annotated[List[BaseMessage], add_messages_bounded]
     intent: Optional[str]
     plan: Optional[List[str]]
     current_step: int
@@ -32,8 +171,8 @@ class AgentState(TypedDict):
     context: str
     tool_instructions: Optional[str]  # Instructions for what tools to use and when
     available_tools: Optional[List[str]]  # List of available tool names
-    tool_results: Optional[List[Dict[str, Any]]]  # Results from tool execution
-    tools_used: Optional[List[str]]  # Track which tools have been called
+    tool_results: List[Dict[str, Any]]  # Results from tool execution
+    tools_used: List[str]  # Track which tools have been called
     tool_call_count: int  # Track number of tool call iterations
 
 class LangGraphResearchAgent:
@@ -43,34 +182,159 @@ class LangGraphResearchAgent:
         # Get knowledge tools
         self.knowledge_tools = get_knowledge_tools()
         
-        # Create base LLM without tools (for intent detection)
+        # Share one pooled HTTP client (async and sync) across all LLMs so calls reuse keep-alive connections
+        http_limits = httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS
+        )
+        self.http_async_client = httpx.AsyncClient(limits=http_limits, timeout=LLM_TIMEOUT_SECONDS)
+        self.http_client = httpx.Client(limits=http_limits, timeout=LLM_TIMEOUT_SECONDS)
+        # Chat completions in flight across all requests, so bursts queue here instead of piling into rate limits.
+        # asyncio primitives bind to one event loop, so there is one semaphore per running loop
+        self._llm_semaphores: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        
+        # Create base LLM without tools (for response generation)
         self.base_llm = ChatOpenAI(
-            model=os.getenv("OPENAI_MODEL", "gpt-4.1"),
-            temperature=float(os.getenv("OPENAI_TEMPERATURE", 0.1))
+            model=OPENAI_MODEL,
+            temperature=OPENAI_TEMPERATURE,
+            extra_body=RESPONSE_CACHE_KEY,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client
         )
+        # Create small LLM for intent classification (short structured output, no need for the full model)
+        # Structured outputs constrain the reply to the IntentClassification schema, so no parsing or validation fallback is needed
+        self.intent_llm = ChatOpenAI(
+            model=OPENAI_INTENT_MODEL,
+            temperature=0,
+            extra_body=INTENT_CACHE_KEY,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client
+        ).with_structured_output(IntentClassification, method="json_schema")
         # Create LLM with tools bound (for tool execution)
-        self.llm = self.base_llm.bind_tools(self.knowledge_tools)
-        
-        self.research_agent = SimpleResearchAgent()
+        self.llm = self.base_llm.bind_tools(self.knowledge_tools, extra_body=AGENT_CACHE_KEY)
         
         # Knowledge graph access will be through tools only
         
-        # Create prompts instance
+        # Cache of intent detection results keyed on the normalized request and the previous request
+        self.intent_cache = TTLCache(max_size=2048, expiry_minutes=60)
+        
+        # Optional second tier matching paraphrased requests by embedding similarity
+        self.intent_embeddings = None
+        self.semantic_intent_cache = None
+        if INTENT_SEMANTIC_CACHE:
+            self.intent_embeddings = OpenAIEmbeddings(
+                model=INTENT_EMBEDDING_MODEL,
+                http_client=self.http_client,
+                http_async_client=self.http_async_client
+            )
+            self.semantic_intent_cache = SemanticCache(max_size=512, expiry_minutes=60, threshold=0.95)
+        
+        # Create prompts instance and build each template once rather than on every node call
         self.prompts = Prompts()
+        self.intent_detection_prompt = self.prompts.intent_detection_prompt
+        self.agent_execution_prompt = self.prompts.agent_execution_prompt
+        self.response_generation_prompt = self.prompts.response_generation_prompt
         
         # Note: Using simplified three-node architecture instead of separate node classes
         
-        # Create tool node for knowledge tools
-        self.tool_node = ToolNode(self.knowledge_tools)
+        # Tool lookup for the tools node
+        self._tool_by_name = {tool.name: tool for tool in self.knowledge_tools}
+        
+        # LLMs bound to a specific tool subset, keyed on the tool names so schemas are only serialized once
+        self._bound_llm_cache: Dict[frozenset, Any] = {}
+        
+        # Bind each intent's default tool set up front so the common cases never bind on the request path
+        for tool_names in INTENT_TOOLS.values():
+            self._llm_for_tools(list(tool_names))
         
         # Build graph
         self.graph = self._build_graph()
         
-        # Memory for conversation state
-        self.memory = MemorySaver()
+        # Memory for conversation state; a SQLite checkpointer needs a running event loop, so it is swapped in on first use
+        self.memory = self._create_checkpointer()
+        self._checkpoint_conn = None
+        self._checkpointer_ready = False
+        self._checkpointer_locks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
         
-        # Compile graph with memory
-        self.compiled_graph = self.graph.compile(checkpointer=self.memory)
+        # Compile graph with memory and a node cache for repeated response compilations
+        self.node_cache = InMemoryCache()
+        self.compiled_graph = self.graph.compile(checkpointer=self.memory, cache=self.node_cache)
+    
+    def _llm_semaphore(self) -> asyncio.Semaphore:
+        """Get the chat completion semaphore for the running event loop"""
+        return _for_running_loop(self._llm_semaphores, lambda: asyncio.Semaphore(LLM_MAX_CONCURRENCY))
+    
+    def _checkpointer_lock(self) -> asyncio.Lock:
+        """Get the checkpointer setup lock for the running event loop"""
+        return _for_running_loop(self._checkpointer_locks, asyncio.Lock)
+    
+    async def setup(self) -> None:
+        """Prepare resources that need the running event loop, so the first request doesn't pay for them"""
+        await self._ensure_checkpointer()
+        await load_token_encoding()
+    
+    async def aclose(self) -> None:
+        """Close the pooled HTTP connections shared by the LLMs and the checkpoint database connection"""
+        await self.http_async_client.aclose()
+        self.http_client.close()
+        if self._checkpoint_conn is not None:
+            await self._checkpoint_conn.close()
+            self._checkpoint_conn = None
+    
+    def _create_checkpointer(self) -> Any:
+        """Use a Redis checkpointer when REDIS_URL is set so state is shared across workers, otherwise keep it in memory"""
+        if REDIS_URL:
+            try:
+                from langgraph.checkpoint.redis.aio import AsyncRedisSaver
+                return AsyncRedisSaver(redis_url=REDIS_URL)
+            except ImportError:
+                logger.warning("langgraph-checkpoint-redis not available, falling back to the next checkpointer")
+            except Exception as e:
+                logger.error(f"Could not create the Redis checkpointer, falling back to the next checkpointer: {str(e)}")
+        return MemorySaver()
+    
+    async def _create_sqlite_checkpointer(self) -> Optional[Any]:
+        """Open the SQLite checkpointer for CHECKPOINT_DB, or None if it can't be used"""
+        try:
+            import aiosqlite
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        except ImportError:
+            logger.warning("langgraph-checkpoint-sqlite not available, keeping conversation state in memory")
+            return None
+        
+        conn = aiosqlite.connect(CHECKPOINT_DB)
+        try:
+            # The saver binds to the running event loop, so it can only be built from inside it
+            saver = AsyncSqliteSaver(conn)
+            await saver.setup()
+        except Exception as e:
+            logger.error(f"Could not open checkpoint database {CHECKPOINT_DB}, keeping conversation state in memory: {str(e)}")
+            try:
+                await conn.close()
+            except Exception:
+                pass
+            return None
+        
+        self._checkpoint_conn = conn
+        return saver
+    
+    async def _ensure_checkpointer(self) -> None:
+        """Open the configured checkpointer and create its indexes or tables once, before the first run that needs them"""
+        if self._checkpointer_ready:
+            return
+        async with self._checkpointer_lock():
+            if self._checkpointer_ready:
+                return
+            # Redis takes precedence when configured and available
+            if CHECKPOINT_DB and isinstance(self.memory, MemorySaver):
+                sqlite_saver = await self._create_sqlite_checkpointer()
+                if sqlite_saver is not None:
+                    self.memory = sqlite_saver
+                    self.compiled_graph = self.graph.compile(checkpointer=self.memory, cache=self.node_cache)
+            setup = getattr(self.memory, "asetup", None)
+            if setup is not None:
+                await setup()
+            self._checkpointer_ready = True
     
     def _build_graph(self) -> StateGraph:
         """Build the LangGraph workflow"""
@@ -79,12 +343,26 @@ class LangGraphResearchAgent:
         # Add nodes using standard LangGraph pattern
         workflow.add_node("intent_and_setup", self._intent_and_setup_node)
         workflow.add_node("agent", self._agent_node)  # LLM with tools bound
-        workflow.add_node("tools", self.tool_node)   # Standard ToolNode
-        workflow.add_node("response_compilation", self._response_compilation_node)
+        workflow.add_node("tools", self._tools_node)  # Runs the agent's tool calls concurrently
+        # Identical request + research inputs produce the same response, so skip the LLM call for an hour
+        workflow.add_node(
+            "response_compilation",
+            self._response_compilation_node,
+            cache_policy=CachePolicy(key_func=self._response_cache_key, ttl=3600)
+        )
         
         # Standard LangGraph flow
         workflow.add_edge(START, "intent_and_setup")
-        workflow.add_edge("intent_and_setup", "agent")
+        
+        # General conversation skips the tool loop and goes straight to the response
+        workflow.add_conditional_edges(
+            "intent_and_setup",
+            self._route_by_intent,
+            {
+                "agent": "agent",
+                "response": "response_compilation"
+            }
+        )
         
         # Conditional routing based on tool calls
         workflow.add_conditional_edges(
@@ -102,119 +380,308 @@ class LangGraphResearchAgent:
         
         return workflow
     
-    def _intent_and_setup_node(self, state: AgentState) -> AgentState:
+    async def _intent_and_setup_node(self, state: AgentState) -> Dict[str, Any]:
         """First node: determine the intent and setup the appropriate tools to call for that intent"""
         try:
             user_request = state["user_request"]
             context = state["context"]
             
-            # Use LLM to detect intent with detailed prompting
-            prompt = self.prompts.intent_detection_prompt.format_messages(
-                user_request=user_request,
-                context=context
-            )
-            logger.info(f"Intent detection prompt: {prompt}")
-            response = self.base_llm.invoke(prompt)
+            update: Dict[str, Any] = {}
             
-            # Parse the JSON response from the LLM
-            try:
-                import json
-                intent_data = json.loads(response.content.strip())
-
-                intent = intent_data.get("intent", "general")
-                suggested_tools = intent_data.get("suggested_tools", ["search_knowledge"])
-                instructions = intent_data.get("instructions", "Process the request using available tools.")
-
-                # Validate intent
-                valid_intents = ["research", "analysis", "knowledge_query", "general"]
-                if intent not in valid_intents:
-                    logger.warning(f"Invalid intent '{intent}' received, defaulting to 'general'")
-                    intent = "general"
-                    suggested_tools = ["search_knowledge"]
-                    instructions = "Process the request using basic knowledge search."
-
-            except (json.JSONDecodeError, KeyError) as e:
-                logger.warning(f"Failed to parse LLM intent response: {e}. Using fallback detection.")
-                # Fallback to basic keyword detection
-                raise e
+            # Short conversational messages are classified locally without an LLM call
+            if SMALL_TALK_PATTERN.match(user_request):
+                logger.info("Small talk detected, skipping intent detection LLM call")
+                intent_data = SMALL_TALK_INTENT
+            else:
+                # Search the knowledge graph for the request while the intent LLM call and any paper lookup are in flight
+                (intent_data, related_papers), knowledge_results = await asyncio.gather(
+                    self._detect_intent_and_prefetch_papers(user_request, context),
+                    self._prefetch_knowledge(user_request)
+                )
+                update["knowledge_data"] = {
+                    "query": user_request,
+                    "results": knowledge_results
+                }
+                if related_papers is not None:
+                    update["research_data"] = {
+                        "topic": intent_data["topic"],
+                        "related_papers": related_papers
+                    }
             
-            # Set up state with LLM-determined intent and tool configuration
-            state["intent"] = intent
-            state["available_tools"] = suggested_tools
-            state["tool_instructions"] = instructions
-
-            # Initialize clean message history with just the user request
-            state["messages"] = [HumanMessage(content=user_request)]
-
-            return state
+            # Return only the changed keys; the messages reducer appends the user request to the history
+            update.update({
+                "intent": intent_data["intent"],
+                "available_tools": intent_data["suggested_tools"],
+                "tool_instructions": intent_data["instructions"],
+                "messages": [HumanMessage(content=user_request)]
+            })
+            return update
             
         except Exception as e:
             logger.error(f"Error in intent and setup: {str(e)}")
-            state["intent"] = "general"
-            state["available_tools"] = ["search_knowledge"]
-            state["tool_instructions"] = "Error occurred during setup. Using basic knowledge search."
-            return state
+            # Not "general", which would skip the agent and its tools entirely
+            return {
+                "intent": "research",
+                "available_tools": ["search_knowledge"],
+                "tool_instructions": "Error occurred during setup. Using basic knowledge search.",
+                "messages": [HumanMessage(content=state["user_request"])]
+            }
+    
+    async def _detect_intent_and_prefetch_papers(self, user_request: str, context: str) -> Tuple[Dict[str, Any], Optional[List[Dict[str, Any]]]]:
+        """Detect the intent and, for research requests, look up related papers as soon as the topic is known.
+
+        Research requests always start with get_related_papers, so running it here saves the agent a turn.
+        """
+        intent_data = await self._detect_intent(user_request, context)
+        if intent_data["intent"] in ("research", "analysis") and intent_data["topic"]:
+            return intent_data, await self._prefetch_related_papers(intent_data["topic"])
+        return intent_data, None
+    
+    async def _prefetch_knowledge(self, user_request: str) -> List[Dict[str, Any]]:
+        """Run search_knowledge for the raw user request so the agent starts with existing knowledge"""
+        search_tool = get_knowledge_tool("search_knowledge")
+        results = await invoke_tool_cached(search_tool, {"query": user_request, "limit": 10})
+        return results or []
+    
+    async def _prefetch_related_papers(self, topic: str) -> List[Dict[str, Any]]:
+        """Run get_related_papers for the detected topic so the agent can go straight to storing results"""
+        papers_tool = get_knowledge_tool("get_related_papers")
+        results = await invoke_tool_cached(papers_tool, {"topic": topic})
+        return results or []
+    
+    def _format_results(self, results: Optional[List[Dict[str, Any]]]) -> str:
+        """Serialize prefetched tool results for a prompt"""
+        if not results:
+            return "None"
+        formatted = orjson.dumps(results, default=str).decode()
+        if len(formatted) > MAX_TOOL_RESULT_LENGTH:
+            formatted = formatted[:MAX_TOOL_RESULT_LENGTH] + "..."
+        return formatted
+    
+    def _intent_context(self, context: Any) -> str:
+        """Reduce the session context to what the intent classifier needs: the previous request.
+
+        The full session history grows every turn, so keying the intent cache on it would never hit.
+        """
+        if isinstance(context, dict):
+            context = context.get("session", [])
+        if isinstance(context, list):
+            last_interaction = context[-1] if context else {}
+            if isinstance(last_interaction, dict):
+                return str(last_interaction.get("request", ""))
+            return str(last_interaction)
+        return str(context or "")
     
-    def _agent_node(self, state: AgentState) -> AgentState:
+    async def _detect_intent(self, user_request: str, context: str) -> Dict[str, Any]:
+        """Use the intent LLM to classify the request and suggest tools and instructions"""
+        # Repeated requests skip the LLM call entirely
+        intent_context = self._intent_context(context)
+        cache_key = (" ".join(user_request.lower().split()), intent_context)
+        cached_intent = self.intent_cache.get(cache_key)
+        if cached_intent is not None:
+            logger.info("Intent cache hit: %s", cached_intent["intent"])
+            return cached_intent
+        
+        # Paraphrases of a recent request in the same context reuse its classification
+        request_vector = None
+        if self.semantic_intent_cache is not None:
+            try:
+                request_vector = await self.intent_embeddings.aembed_query(cache_key[0])
+                cached_intent = self.semantic_intent_cache.get(request_vector, namespace=cache_key[1])
+                if cached_intent is not None:
+                    logger.info("Semantic intent cache hit: %s", cached_intent["intent"])
+                    self.intent_cache.set(cache_key, cached_intent)
+                    return cached_intent
+            except Exception as e:
+                logger.warning(f"Semantic intent cache lookup failed: {str(e)}")
+        
+        # Use LLM to detect intent with detailed prompting
+        prompt = self.intent_detection_prompt.format_messages(
+            user_request=user_request,
+            context=intent_context
+        )
+        logger.debug("Intent detection prompt: %s", prompt)
+        async with self._llm_semaphore():
+            classification = await self.intent_llm.ainvoke(prompt)
+        
+        intent_data = {
+            "intent": classification.intent,
+            "topic": classification.topic.strip(),
+            "suggested_tools": classification.suggested_tools,
+            "instructions": classification.instructions
+        }
+        self.intent_cache.set(cache_key, intent_data)
+        if request_vector is not None:
+            self.semantic_intent_cache.set(request_vector, intent_data, namespace=cache_key[1])
+        return intent_data
+    
+    async def _agent_node(self, state: AgentState) -> Dict[str, Any]:
         """Standard LangGraph agent node - LLM with tools that can make tool calls"""
         try:
             user_request = state["user_request"]
             intent = state["intent"]
             available_tools = state.get("available_tools", [])
             tool_instructions = state.get("tool_instructions", "")
-            tools_used = state.get("tools_used") or []
-            tool_call_count = state.get("tool_call_count", 0)
+            tools_used = state["tools_used"]
+            tool_call_count = state["tool_call_count"]
+            
+            # Stop gathering once the iteration budget is spent; the last message is a tool result so routing moves on
+            if tool_call_count >= MAX_TOOL_ITERATIONS:
+                logger.warning("Reached %d tool iterations, moving on to the response", MAX_TOOL_ITERATIONS)
+                return {}
             
             # Use prompt from prompts class
-            prompt_messages = self.prompts.agent_execution_prompt.format_messages(
+            prompt_messages = self.agent_execution_prompt.format_messages(
                 instructions=tool_instructions,
                 available_tools=', '.join(available_tools),
                 user_request=user_request,
                 intent=intent,
-                messages=state["messages"]
+                existing_knowledge=self._format_results((state.get("knowledge_data") or {}).get("results")),
+                related_papers=self._format_results((state.get("research_data") or {}).get("related_papers")),
+                messages=self._agent_history(state["messages"])
             )
 
             # Call LLM with all tools available - it will decide which tools to call
-            logger.info(f"Calling LLM with tools. Available tools: {available_tools}")
-            logger.info(f"Tool instructions: {tool_instructions}")
-            response = self.llm.invoke(prompt_messages)
-            logger.info(f"LLM response type: {type(response)}")
-            logger.info(f"LLM response has tool_calls: {hasattr(response, 'tool_calls')}")
-            if hasattr(response, 'tool_calls'):
-                logger.info(f"Tool calls value: {response.tool_calls}")
-                logger.info(f"Number of tool calls: {len(response.tool_calls) if response.tool_calls else 0}")
-            logger.info(f"LLM response content preview: {response.content[:200] if hasattr(response, 'content') else 'No content'}")
+            logger.info("Calling LLM with tools. Available tools: %s", available_tools)
+            logger.debug("Tool instructions: %s", tool_instructions)
+            async with self._llm_semaphore():
+                response = await self._llm_for_tools(available_tools, intent).ainvoke(prompt_messages)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Tool calls value: %s", getattr(response, 'tool_calls', None))
+                logger.debug("LLM response content preview: %s", str(getattr(response, 'content', 'No content'))[:200])
+            
+            # Drop tool calls that repeat one already made for this request; their results are already in the history
+            if getattr(response, 'tool_calls', None):
+                response.tool_calls = self._dedupe_tool_calls(response.tool_calls, state["messages"])
+                # Keep the raw provider payload in step so dropped calls are never sent back to the API
+                kept_ids = {tool_call["id"] for tool_call in response.tool_calls}
+                raw_tool_calls = [tc for tc in response.additional_kwargs.get("tool_calls", []) if tc.get("id") in kept_ids]
+                if raw_tool_calls:
+                    response.additional_kwargs["tool_calls"] = raw_tool_calls
+                else:
+                    response.additional_kwargs.pop("tool_calls", None)
             
             # Track tool usage in state instead of logging
             if hasattr(response, 'tool_calls') and response.tool_calls:
                 # LangChain tool calls have structure: {"name": "...", "args": {...}, "id": "...", "type": "tool_call"}
                 new_tool_calls = [tc["name"] for tc in response.tool_calls]
                 
-                # Update state with tool usage tracking
-                if tools_used is None:
-                    tools_used = []
-                tools_used.extend(new_tool_calls)
-                state["tools_used"] = tools_used
-                state["tool_call_count"] = tool_call_count + 1
-                
-                # Add informational message about tools being called
-                state["messages"].append(AIMessage(
-                    content=f"Calling tools: {', '.join(new_tool_calls)} (iteration {tool_call_count + 1})"
-                ))
-            else:
-                # No tool calls - agent is done gathering information
-                state["messages"].append(AIMessage(
-                    content=f"Information gathering complete. Used tools: {', '.join(tools_used) if tools_used else 'none'}"
-                ))
+                # Return only the new message and counters; progress is tracked in tools_used, not status messages
+                logger.info("Calling tools: %s (iteration %d)", ', '.join(new_tool_calls), tool_call_count + 1)
+                return {
+                    "tools_used": tools_used + new_tool_calls,
+                    "tool_call_count": tool_call_count + 1,
+                    "messages": [response]
+                }
             
-            # Add the actual LLM response to messages
-            state["messages"].append(response)
-            
-            return state
+            # No tool calls - agent is done gathering information
+            logger.info("Information gathering complete. Used tools: %s", ', '.join(tools_used) if tools_used else 'none')
+            return {"messages": [response]}
             
         except Exception as e:
             logger.error(f"Error in agent node: {str(e)}")
-            return state
+            return {}
+    
+    def _dedupe_tool_calls(self, tool_calls: List[Dict[str, Any]], messages: List[BaseMessage]) -> List[Dict[str, Any]]:
+        """Remove tool calls whose name and arguments match an earlier call in this turn or in the same response"""
+        seen = set()
+        for msg in reversed(messages):
+            if isinstance(msg, HumanMessage):
+                break
+            for tool_call in getattr(msg, 'tool_calls', None) or []:
+                seen.add((tool_call["name"], orjson.dumps(tool_call["args"], option=orjson.OPT_SORT_KEYS, default=str)))
+        
+        unique_calls = []
+        for tool_call in tool_calls:
+            signature = (tool_call["name"], orjson.dumps(tool_call["args"], option=orjson.OPT_SORT_KEYS, default=str))
+            if signature in seen:
+                logger.info("Skipping duplicate tool call: %s", tool_call['name'])
+                continue
+            seen.add(signature)
+            unique_calls.append(tool_call)
+        return unique_calls
+    
+    def _llm_for_tools(self, available_tools: List[str], intent: Optional[str] = None) -> Any:
+        """Get the LLM bound to just the tools available for this request, falling back to the intent's tools and then all tools"""
+        key = frozenset(name for name in available_tools if name in self._tool_by_name)
+        if not key:
+            key = frozenset(INTENT_TOOLS.get(intent, ()))
+        if not key:
+            return self.llm
+        
+        bound_llm = self._bound_llm_cache.get(key)
+        if bound_llm is None:
+            # Keep registry order so the same tool set always produces the same request payload
+            bound_llm = self.base_llm.bind_tools(
+                [tool for tool in self.knowledge_tools if tool.name in key],
+                extra_body=AGENT_CACHE_KEY
+            )
+            self._bound_llm_cache[key] = bound_llm
+        return bound_llm
+    
+    def _agent_history(self, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """Keep the current turn in full plus as much earlier conversation as fits in MAX_AGENT_HISTORY"""
+        turn_start = next(
+            (i for i in range(len(messages) - 1, -1, -1) if isinstance(messages[i], HumanMessage)),
+            0
+        )
+        current_turn = messages[turn_start:]
+        budget = MAX_AGENT_HISTORY - len(current_turn)
+        if budget <= 0 or turn_start == 0:
+            return current_turn
+        
+        # Start earlier history on a user message so tool calls are never separated from their results
+        earlier = trim_messages(
+            messages[:turn_start],
+            max_tokens=budget,
+            token_counter=len,
+            strategy="last",
+            start_on="human"
+        )
+        return earlier + current_turn
+    
+    async def _tools_node(self, state: AgentState) -> Dict[str, Any]:
+        """Run all tool calls from the last agent turn concurrently and return their results as tool messages"""
+        tool_calls = state["messages"][-1].tool_calls
+        tool_messages, _ = await asyncio.gather(
+            asyncio.gather(*(self._run_tool_call(tool_call) for tool_call in tool_calls)),
+            load_token_encoding()
+        )
+        
+        # Keep a running copy of this request's results, cut to a token budget, for response compilation
+        new_results = []
+        for msg in tool_messages:
+            result, tokens = truncate_to_tokens(str(msg.content), MAX_TOOL_RESULT_TOKENS)
+            new_results.append({"tool": msg.name, "result": result, "tokens": tokens})
+        
+        return {"messages": list(tool_messages), "tool_results": state["tool_results"] + new_results}
+    
+    async def _run_tool_call(self, tool_call: Dict[str, Any]) -> ToolMessage:
+        """Execute a single tool call, reporting failures back to the agent instead of aborting the run"""
+        tool_name = tool_call["name"]
+        tool = self._tool_by_name.get(tool_name)
+        
+        if tool is None:
+            content = f"Error: {tool_name} is not a valid tool"
+        else:
+            try:
+                # A slow tool shouldn't hold up the results of the other calls gathered with it
+                result = await asyncio.wait_for(invoke_tool_cached(tool, tool_call["args"]), timeout=TOOL_TIMEOUT_SECONDS)
+                content = result if isinstance(result, str) else orjson.dumps(result, default=str).decode()
+            except asyncio.TimeoutError:
+                logger.error(f"Tool {tool_name} timed out after {TOOL_TIMEOUT_SECONDS}s")
+                content = f"Error: {tool_name} timed out after {TOOL_TIMEOUT_SECONDS} seconds"
+            except Exception as e:
+                logger.error(f"Error running tool {tool_name}: {str(e)}")
+                content = f"Error: {str(e)}"
+        
+        return ToolMessage(content=content, name=tool_name, tool_call_id=tool_call["id"])
+    
+    def _route_by_intent(self, state: AgentState) -> str:
+        """Determine if the request needs the tool-calling agent or can be answered directly"""
+        if state.get("intent") == "general":
+            return "response"
+        return "agent"
     
     def _should_continue_to_tools(self, state: AgentState) -> str:
         """Determine if we should continue to tools or move to response compilation"""
@@ -230,92 +697,188 @@ class LangGraphResearchAgent:
         
         return "response"
     
-    def _response_compilation_node(self, state: AgentState) -> AgentState:
+    async def _response_compilation_node(self, state: AgentState) -> Dict[str, Any]:
         """Third node: compile the response from the collected context"""
         try:
             user_request = state["user_request"]
             intent = state["intent"]
-            tools_used = state.get("tools_used") or []
-            tool_call_count = state.get("tool_call_count", 0)
-            messages = state["messages"]
+            tools_used = state["tools_used"]
+            tool_call_count = state["tool_call_count"]
             
-            # Extract tool results from ToolMessage objects in the message history
-            tool_results = []
-            for msg in messages:
-                if isinstance(msg, ToolMessage):
-                    tool_results.append({
-                        "tool": getattr(msg, 'name', 'unknown_tool'),
-                        "result": msg.content
-                    })
+            # Prefetched lookups are trimmed like they are for the agent, and papers the agent fetched again are dropped
+            existing_knowledge = self._format_results((state.get("knowledge_data") or {}).get("results"))
+            related_papers = self._format_results(self._unfetched_papers(
+                (state.get("research_data") or {}).get("related_papers") or [],
+                state["tool_results"]
+            ))
+            
+            # Tool results get whatever is left of the token budget once the prefetched data is counted
+            budget = COMPILE_TOOL_RESULTS_TOKENS - count_tokens(existing_knowledge) - count_tokens(related_papers)
+            tool_results = self._select_tool_results(state["tool_results"], budget)
             
             # Prepare research data for response generation
             research_data = {
                 "intent": intent,
                 "tools_used": ', '.join(tools_used) if tools_used else 'none',
                 "tool_call_count": tool_call_count,
+                "existing_knowledge": existing_knowledge,
+                "related_papers": related_papers,
                 "tool_results": tool_results
             }
 
-            # Use the response generation prompt from prompts class
-            prompt_messages = self.prompts.response_generation_prompt.format_messages(
+            # Use the response generation prompt from prompts class, omitting research data for general conversation
+            prompt_messages = self.response_generation_prompt.format_messages(
                 user_request=user_request,
-                research_data=str(research_data)
+                research_data=orjson.dumps(research_data, option=orjson.OPT_SORT_KEYS, default=str).decode() if intent != "general" else "None"
             )
 
-            # Generate final response using the structured information
-            response = self.base_llm.invoke(prompt_messages)
-            
-            state["final_response"] = response.content
-            state["messages"].append(response)
+            # Generate final response using the structured information, streaming so tokens reach stream consumers as they arrive
+            response = None
+            async with self._llm_semaphore():
+                async for chunk in self.base_llm.astream(prompt_messages):
+                    response = chunk if response is None else response + chunk
             
-            logger.info(f"Response compiled for intent: {intent} using {len(tools_used)} tools across {tool_call_count} iterations")
+            logger.info("Response compiled for intent: %s using %d tools across %d iterations", intent, len(tools_used), tool_call_count)
             
-            return state
+            # Return a fresh message without the run id so a cached replay appends instead of replacing an earlier reply
+            return {"final_response": response.content, "messages": [AIMessage(content=response.content)]}
             
         except Exception as e:
             logger.error(f"Error in response compilation: {str(e)}")
             error_response = "I apologize, but I encountered an error while compiling the response. Please try again."
-            state["final_response"] = error_response
-            state["messages"].append(AIMessage(content=error_response))
-            return state
+            return {"final_response": error_response, "messages": [AIMessage(content=error_response)]}
+    
+    def _unfetched_papers(self, papers: List[Dict[str, Any]], tool_results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop prefetched papers that already appear in the agent's own get_related_papers results"""
+        fetched = "".join(item["result"] for item in tool_results if item["tool"] == "get_related_papers")
+        if not fetched:
+            return papers
+        return [
+            paper for paper in papers
+            if paper and (paper.get("arxiv_id") or paper.get("title") or "") not in fetched
+        ]
+    
+    def _select_tool_results(self, tool_results: List[Dict[str, Any]], budget: int = COMPILE_TOOL_RESULTS_TOKENS) -> List[Dict[str, Any]]:
+        """Keep the most recent distinct tool results that fit the token budget, in call order"""
+        selected = []
+        seen = set()
+        for item in reversed(tool_results):
+            key = (item["tool"], item["result"])
+            if key in seen:
+                continue
+            if item["tokens"] > budget:
+                break
+            seen.add(key)
+            budget -= item["tokens"]
+            selected.append({"tool": item["tool"], "result": item["result"]})
+        selected.reverse()
+        return selected
     
+    def _response_cache_key(self, state: AgentState) -> str:
+        """Cache key for response compilation, covering everything that goes into its prompt"""
+        key_data = [
+            state.get("user_request"),
+            state.get("intent"),
+            state.get("tools_used"),
+            state.get("tool_results"),
+            (state.get("knowledge_data") or {}).get("results"),
+            (state.get("research_data") or {}).get("related_papers")
+        ]
+        return hashlib.sha256(orjson.dumps(key_data, option=orjson.OPT_SORT_KEYS, default=str)).hexdigest()
+    
+    def _initial_state(self, user_request: str, session_id: str, context: str) -> AgentState:
+        """Build the initial workflow state for a request"""
+        return AgentState(
+            messages=[],
+            intent=None,
+            plan=None,
+            current_step=0,
+            research_data=None,
+            knowledge_data=None,
+            final_response=None,
+            user_request=user_request,
+            session_id=session_id,
+            context=context,
+            tool_results=[],
+            tools_used=[],
+            tool_call_count=0
+        )
+
+    def _format_result(self, final_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape the final workflow state into the agent response"""
+        return {
+            "response": final_state.get("final_response", "No response generated"),
+            "intent": final_state.get("intent"),
+            "plan": final_state.get("plan"),
+            "research_data": final_state.get("research_data"),
+            "message_count": len(final_state.get("messages", []))
+        }
+
     async def process_request(self, user_request: str, session_id: str, context: str) -> Dict[str, Any]:
         """Process a user request through the LangGraph workflow"""
         try:
-            # Initialize state
-            initial_state = AgentState(
-                messages=[],
-                intent=None,
-                plan=None,
-                current_step=0,
-                research_data=None,
-                knowledge_data=None,
-                final_response=None,
-                user_request=user_request,
-                session_id=session_id,
-                context=context,
-                tool_results=None,
-                tools_used=None,
-                tool_call_count=0
-            )
-            
             # Configure run
             config = {"configurable": {"thread_id": session_id}}
+            await self._ensure_checkpointer()
+            track_run_writes()
             
             # Execute workflow
-            final_state = await self.compiled_graph.ainvoke(initial_state, config=config)
+            final_state = await self.compiled_graph.ainvoke(self._initial_state(user_request, session_id, context), config=config)
             
-            return {
-                "response": final_state.get("final_response", "No response generated"),
-                "intent": final_state.get("intent"),
-                "plan": final_state.get("plan"),
-                "research_data": final_state.get("research_data"),
-                "messages": [msg.content for msg in final_state.get("messages", [])]
-            }
+            # Make sure knowledge stored in the background during this run has landed before answering;
+            # only the streaming path gets its response out ahead of the writes
+            await wait_for_pending_writes()
+            
+            return self._format_result(final_state)
             
         except Exception as e:
             logger.error(f"Error processing request: {str(e)}")
             return {
                 "response": "I apologize, but I encountered an error while processing your request.",
                 "error": str(e)
-            }
\ No newline at end of file
+            }
+
+    async def process_request_stream(self, user_request: str, session_id: str, context: str) -> AsyncIterator[Dict[str, Any]]:
+        """Process a user request, yielding final response tokens as they are generated and then the full result"""
+        try:
+            config = {"configurable": {"thread_id": session_id}}
+            final_state: Dict[str, Any] = {}
+            await self._ensure_checkpointer()
+            track_run_writes()
+
+            async for mode, payload in self.compiled_graph.astream(
+                self._initial_state(user_request, session_id, context),
+                config=config,
+                stream_mode=["messages", "values"]
+            ):
+                if mode == "values":
+                    final_state = payload
+                    continue
+
+                # Only forward tokens from the final response, not intent detection or tool-calling turns
+                chunk, metadata = payload
+                if metadata.get("langgraph_node") == "response_compilation" and chunk.content:
+                    yield {"type": "token", "content": chunk.content}
+
+            await wait_for_pending_writes()
+            yield {"type": "result", **self._format_result(final_state)}
+
+        except Exception as e:
+            logger.error(f"Error streaming request: {str(e)}")
+            yield {
+                "type": "result",
+                "response": "I apologize, but I encountered an error while processing your request.",
+                "error": str(e)
+            }
+
+# Global instance cache
+_global_agent = None
+
+def get_langgraph_agent() -> LangGraphResearchAgent:
+    """Get the global LangGraph research agent, building and compiling the graph only once per process"""
+    global _global_agent
+    
+    if _global_agent is None:
+        _global_agent = LangGraphResearchAgent()
+    
+    return _global_agent
@@ -1,75 +1,68 @@
 from typing import Dict, List
+import inspect
+from langchain_core.messages import SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 
-class Prompts:
-    @property
-    def intent_detection_prompt(self) -> ChatPromptTemplate:
-        """Prompt for detecting user intent and suggesting appropriate tools"""
-        return ChatPromptTemplate.from_messages([
-            ("system", """Analyze the user's request and determine the primary intent. Choose from these categories:
+# Templates are built once at import, with the source indentation stripped from the system text;
+# the Prompts properties hand out these shared instances
+INTENT_DETECTION_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content=inspect.cleandoc("""Analyze the user's request and determine the primary intent. Choose from these categories:
 
             1. "research" - Research new topics, find papers, discover academic insights
-               - Tools: search_knowledge, get_related_papers, add_research_paper, add_research_insight
+               - Tools: search_knowledge, get_related_papers, add_research_papers, add_research_insight
                - Instructions: Search knowledge graph, find papers related to [topic], generate insights from papers, store papers and insights in knowledge graph
 
             2. "analysis" - Analyze specific papers or research findings in detail
-               - Tools: search_knowledge, get_related_papers, add_research_paper, add_research_insight
+               - Tools: search_knowledge, get_related_papers, add_research_papers, add_research_insight
                - Instructions: Search knowledge graph for [topic], generate insights from findings, store insights in knowledge graph
 
-            3. "knowledge_query" - Query existing knowledge and stored insights
+            3. "knowledge_query" - Query existing knowledge, stored insights, or questions answerable with the knowledge graph
                - Tools: search_knowledge, get_research_insights, get_knowledge_summary
                - Instructions: Search knowledge graph for [topic], collect prior insights and papers, summarize findings
 
-            4. "general" - General conversation or questions answerable with knowledge graph
-               - Tools: search_knowledge
-               - Instructions: Search knowledge graph for relevant topics, provide helpful response
+            4. "general" - General conversation (greetings, chit-chat, questions about the assistant) that needs no knowledge lookup
+               - Tools: none
+               - Instructions: Respond directly to the user
 
             Replace [topic] with the actual topic from the user's request in the instructions.
+            Also extract "topic": a concise academic search query for the subject of the request (empty string for "general").
 
-            Respond with ONLY a JSON object containing: intent, suggested_tools, instructions.
-            """),
-            ("human", "User request: {user_request}\n\nContext: {context}")
-        ])
-
-
-    @property
-    def agent_execution_prompt(self) -> ChatPromptTemplate:
-        """Prompt for the agent node to decide which tools to use"""
-        return ChatPromptTemplate.from_messages([
-            ("system", """You are a research assistant with access to knowledge graph tools.
+            Respond with ONLY a JSON object containing: intent, topic, suggested_tools, instructions.
+            """)),
+    ("human", "User request: {user_request}\n\nContext: {context}")
+])
 
-            CRITICAL: You MUST use the available tools to fulfill this request. Always start by calling tools.
+AGENT_EXECUTION_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content=inspect.cleandoc("""You are a research assistant with access to knowledge graph tools.
 
-            INSTRUCTIONS: {instructions}
-            AVAILABLE TOOLS: {available_tools}
-            USER REQUEST: {user_request}
-            INTENT: {intent}
+            CRITICAL: You MUST use the available tools to fulfill the request. Always start by calling tools.
+            The instructions, available tools, user request, intent, and existing knowledge for this request follow in the next message.
+            EXISTING KNOWLEDGE already holds the search_knowledge results for the user request itself, so never repeat that search; only call search_knowledge for different queries.
+            RELATED PAPERS, when present, already holds the get_related_papers results for the request's topic, so skip that lookup and go straight to storing papers and insights.
 
             STORAGE REQUIREMENTS:
-            - Store ALL papers using add_research_paper(paper_data={{"title": "...", "authors": [...], "arxiv_id": "...", "categories": [...], "content": "..."}})
+            - Store ALL papers with a single add_research_papers(papers=[{"title": "...", "authors": [...], "arxiv_id": "...", "categories": [...], "content": "..."}, ...]) call
             - Generate MULTIPLE insights using add_research_insight (3-5 insights minimum)
             - Base insights on the collection of papers AND your prior knowledge from search results
-            - CALL MULTIPLE TOOLS IN PARALLEL when possible (e.g., multiple add_research_paper calls together, multiple add_research_insight calls together)
+            - CALL MULTIPLE TOOLS IN PARALLEL when possible (e.g., add_research_papers together with multiple add_research_insight calls)
 
             CORRECT TOOL CALL FORMAT:
-            add_research_paper(paper_data=complete_paper_dict)
-            add_research_insight(insight="...", topic="...", context={{...}})
-
-            For "research" intent: Use search_knowledge first, then get_related_papers, then call multiple add_research_paper tools in parallel for all papers, then call multiple add_research_insight tools in parallel
-            For "analysis" intent: Use search_knowledge and get_related_papers, then store papers and generate multiple insights
-            For "knowledge_query" intent: Use search_knowledge and get_research_insights
-            For "general" intent: Use search_knowledge to check existing knowledge
-
-            Start by calling the first relevant tool from the available tools list.
-            """),
-            ("placeholder", "{messages}")
-        ])
-
-    @property
-    def response_generation_prompt(self) -> ChatPromptTemplate:
-        """Prompt for generating final responses"""
-        return ChatPromptTemplate.from_messages([
-            ("system", """You are a helpful research assistant. Generate a comprehensive response based on the research data and user request.
+            add_research_papers(papers=[complete_paper_dict, ...])
+            add_research_insight(insight="...", topic="...", context={...})
+
+            For "research" intent: Call get_related_papers (plus any other lookups) together in your first turn, then in a single turn call add_research_papers with all papers and add_research_insight for each insight in parallel
+            For "analysis" intent: Call get_related_papers (plus any other lookups) together in your first turn, then in a single turn store papers and generate multiple insights in parallel
+            For "knowledge_query" intent: Call get_research_insights (plus any other lookups) together in a single turn
+
+            Independent lookups never depend on each other's results, so issue them in the same turn rather than one per turn.
+            Start by calling all of the relevant lookup tools from the available tools list at once.
+            """)),
+    ("human", "INSTRUCTIONS: {instructions}\nAVAILABLE TOOLS: {available_tools}\nUSER REQUEST: {user_request}\nINTENT: {intent}\nEXISTING KNOWLEDGE: {existing_knowledge}\nRELATED PAPERS: {related_papers}"),
+    ("placeholder", "{messages}")
+])
+
+RESPONSE_GENERATION_PROMPT = ChatPromptTemplate.from_messages([
+    SystemMessage(content=inspect.cleandoc("""You are a helpful research assistant. Generate a comprehensive response based on the research data and user request.
             
             If research data is available, include:
             - Key findings from the research
@@ -80,7 +73,29 @@ class Prompts:
             If no research data is available, provide a helpful general response.
             
             Be conversational but informative.
-            """),
-            ("human", "User request: {user_request}\n\nResearch data: {research_data}")
-        ])
+            """)),
+    ("human", "User request: {user_request}\n\nResearch data: {research_data}")
+])
+
+
+class Prompts:
+    @property
+    def intent_detection_prompt(self) -> ChatPromptTemplate:
+        """Prompt for detecting user intent and suggesting appropriate tools"""
+        return INTENT_DETECTION_PROMPT
+
+
+    @property
+    def agent_execution_prompt(self) -> ChatPromptTemplate:
+        """Prompt for the agent node to decide which tools to use
+
+        The system message is a prebuilt SystemMessage with no variables, so it is never re-rendered
+        and stays a byte-identical prefix for provider prompt caching.
+        """
+        return AGENT_EXECUTION_PROMPT
+
+    @property
+    def response_generation_prompt(self) -> ChatPromptTemplate:
+        """Prompt for generating final responses"""
+        return RESPONSE_GENERATION_PROMPT
 
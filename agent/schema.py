@@ -1,26 +1,43 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 
 class RequestFormat(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     conversation_hash: str = Field(description="The conversation hash associated with the request")
-    request_timestamp: Optional[str] = Field(default=datetime.now().isoformat(), description="The timestamp of the request")
+    request_timestamp: Optional[str] = Field(default_factory=lambda: datetime.now().isoformat(), description="The timestamp of the request")
     customer_message: str = Field(description="The message of the request")
 
 
 class ResponseFormat(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     response: str = Field(description="The response to the request")
     intent: Optional[str] = Field(default=None, description="The detected intent of the request")
     plan: Optional[List[str]] = Field(default=None, description="The execution plan created for the request")
-    research_data: Optional[Dict[str, Any]] = Field(default=None, description="Research data if applicable")
+    research_data: Optional["ResearchData"] = Field(default=None, description="Research data if applicable")
+
+
+class IntentClassification(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    intent: Literal["research", "analysis", "knowledge_query", "general"] = Field(description="The primary intent of the request")
+    topic: str = Field(description="Concise academic search query for the subject of the request, empty for general")
+    suggested_tools: List[str] = Field(description="Names of the tools to use for the request")
+    instructions: str = Field(description="Instructions for how to use the tools to fulfill the request")
 
 
 class KnowledgeSearchRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     query: str = Field(description="Search query for the knowledge store")
     limit: Optional[int] = Field(default=10, description="Maximum number of results to return")
 
 
 class KnowledgeSearchResult(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     content: str = Field(description="The content of the knowledge item")
     metadata: Dict[str, Any] = Field(description="Metadata associated with the knowledge item")
     relevance_score: float = Field(description="Relevance score of the result")
@@ -28,6 +45,8 @@ class KnowledgeSearchResult(BaseModel):
 
 
 class ResearchPaper(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     title: str = Field(description="Title of the research paper")
     authors: List[str] = Field(description="List of authors")
     arxiv_id: str = Field(description="ArXiv ID of the paper")
@@ -37,7 +56,28 @@ class ResearchPaper(BaseModel):
     source: str = Field(description="Source of the paper (knowledge_graph or arxiv_search)")
 
 
+class ResearchData(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    topic: str = Field(description="Topic the research was gathered for")
+    related_papers: List[ResearchPaper] = Field(default_factory=list, description="Papers related to the topic")
+
+    @field_validator("related_papers", mode="before")
+    @classmethod
+    def drop_invalid_papers(cls, papers: Any) -> List[Any]:
+        """Skip missing or incomplete papers from the knowledge graph instead of failing the whole response"""
+        valid_papers = []
+        for paper in papers or []:
+            try:
+                valid_papers.append(ResearchPaper.model_validate(paper))
+            except ValidationError:
+                continue
+        return valid_papers
+
+
 class ResearchInsight(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     insight: str = Field(description="The research insight content")
     topic: str = Field(description="Topic of the insight")
     context: Dict[str, Any] = Field(description="Context information")
@@ -46,10 +86,16 @@ class ResearchInsight(BaseModel):
 
 
 class KnowledgeSummary(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     topic: str = Field(description="Topic of the knowledge summary")
     related_papers: List[ResearchPaper] = Field(description="Related research papers")
     research_insights: List[ResearchInsight] = Field(description="Research insights")
     general_knowledge: List[KnowledgeSearchResult] = Field(description="General knowledge items")
     total_papers: int = Field(description="Total number of related papers")
     total_insights: int = Field(description="Total number of insights")
-    total_knowledge_items: int = Field(description="Total number of general knowledge items")
\ No newline at end of file
+    total_knowledge_items: int = Field(description="Total number of general knowledge items")
+
+
+# ResponseFormat refers to ResearchData, which is defined after it
+ResponseFormat.model_rebuild()
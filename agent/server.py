@@ -14,14 +14,35 @@ from agent.schema import (
 )
 from agent.constants import PROJECT_NAME
 from agent.knowledge_graph import get_knowledge_graph_manager
+from contextlib import asynccontextmanager
+import atexit
 import logging
+import logging.handlers
 import json
-import time
+import os
+import queue
 import uuid
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+
+class DeferredFormatQueueHandler(logging.handlers.QueueHandler):
+    """Queue records unformatted so the listener thread, not the logging caller, does the formatting"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves this process, so the record doesn't need flattening for pickling
+        return record
+
+
+# Configure logging; records are queued and written by a background thread so handlers never block the event loop
+log_queue = queue.SimpleQueue()
+log_stream_handler = logging.StreamHandler()
+log_stream_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+log_listener = logging.handlers.QueueListener(log_queue, log_stream_handler)
+logging.basicConfig(level=getattr(logging, LOG_LEVEL, logging.INFO), handlers=[DeferredFormatQueueHandler(log_queue)])
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 logger.info("Initializing FastAPI application...")
@@ -33,10 +54,18 @@ tracer_provider = register(
 # Template uses OpenAI, but any LLM provider or agentic framework can be plugged in
 LangChainInstrumentor().instrument(tracer_provider=tracer_provider)
 
-app = FastAPI()
 agent = Agent()
 knowledge_graph = get_knowledge_graph_manager()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prepare the agent's checkpointer on startup and release its pooled connections when the server stops"""
+    await agent.langgraph_agent.setup()
+    yield
+    await agent.langgraph_agent.aclose()
+
+app = FastAPI(lifespan=lifespan)
+
 # Store for tracking ongoing processes
 active_processes = {}
 
@@ -45,9 +74,9 @@ def health_check():
     return {"status": "healthy"}
 
 @app.post("/agent", response_model=ResponseFormat)
-def process_request(request: RequestFormat):
+async def process_request(request: RequestFormat):
     try:
-        response = agent.handle_request(request)
+        response = await agent.handle_request(request)
         
         return response
     except Exception as e:
@@ -60,99 +89,51 @@ async def process_request_stream(request: RequestFormat):
     try:
         process_id = str(uuid.uuid4())
         
-        def generate_stream():
+        async def generate_stream():
             try:
                 # Store process info
                 active_processes[process_id] = {
                     "status": "starting",
                     "timestamp": datetime.now().isoformat(),
-                    "request": request.dict()
+                    "request": request.model_dump()
                 }
                 
                 # Send initial status
                 yield f"data: {json.dumps({'type': 'status', 'message': 'Starting analysis...', 'process_id': process_id})}\n\n"
-                time.sleep(0.2)  # Small delay for UI
                 
                 # Update process status
                 active_processes[process_id]["status"] = "processing"
-                yield f"data: {json.dumps({'type': 'status', 'message': 'Processing your request...', 'process_id': process_id})}\n\n"
-                time.sleep(0.2)
-                
-                # Step 1: Detect intent and create plan
-                yield f"data: {json.dumps({'type': 'progress', 'message': 'Analyzing request intent...', 'step': 1, 'total_steps': 5})}\n\n"
-                time.sleep(1.0)  # Realistic delay for intent detection
-                
-                # Step 2: Show that we're starting the main processing
-                yield f"data: {json.dumps({'type': 'progress', 'message': 'Initializing agent workflow...', 'step': 2, 'total_steps': 5})}\n\n"
-                time.sleep(0.8)
+                yield f"data: {json.dumps({'type': 'progress', 'message': 'Processing with research agent...', 'step': 1, 'total_steps': 2})}\n\n"
                 
-                # Step 3: Start actual processing (this is where the real work happens)
-                yield f"data: {json.dumps({'type': 'progress', 'message': 'Processing with research agent...', 'step': 3, 'total_steps': 5})}\n\n"
-                
-                # Process the request with the agent (this is the main work)
+                # Forward response tokens as the agent generates them
                 logger.info("Starting agent request processing...")
-                response = agent.handle_request(request)
-                logger.info(f"Agent processing completed. Response type: {type(response)}")
-                logger.info(f"Response object attributes: {dir(response)}")
-                logger.info(f"Response content preview: {getattr(response, 'response', 'NO RESPONSE ATTR')[:100]}...")
-                
-                # Step 4: Post-processing
-                yield f"data: {json.dumps({'type': 'progress', 'message': 'Finalizing results...', 'step': 4, 'total_steps': 5})}\n\n"
-                time.sleep(0.8)
-                
-                # Step 5: Send additional progress based on detected intent
-                if hasattr(response, 'intent'):
-                    if response.intent == "research":
-                        yield f"data: {json.dumps({'type': 'progress', 'message': 'Research completed - papers analyzed and knowledge updated', 'step': 5, 'total_steps': 5})}\n\n"
-                    elif response.intent == "knowledge_query":
-                        yield f"data: {json.dumps({'type': 'progress', 'message': 'Knowledge base searched and results compiled', 'step': 5, 'total_steps': 5})}\n\n"
+                result = {}
+                async for event in agent.stream_request(request):
+                    if event["type"] == "token":
+                        yield f"data: {json.dumps(event)}\n\n"
                     else:
-                        yield f"data: {json.dumps({'type': 'progress', 'message': 'Response generated successfully', 'step': 5, 'total_steps': 5})}\n\n"
-                else:
-                    yield f"data: {json.dumps({'type': 'progress', 'message': 'Processing completed', 'step': 5, 'total_steps': 5})}\n\n"
+                        result = event
+                logger.info("Agent processing completed")
                 
-                time.sleep(0.5)
+                # Send progress based on detected intent
+                response_intent = result.get('intent')
+                if response_intent == "research":
+                    completion_message = 'Research completed - papers analyzed and knowledge updated'
+                elif response_intent == "knowledge_query":
+                    completion_message = 'Knowledge base searched and results compiled'
+                else:
+                    completion_message = 'Response generated successfully'
+                yield f"data: {json.dumps({'type': 'progress', 'message': completion_message, 'step': 2, 'total_steps': 2})}\n\n"
                 
                 # Send final response
                 active_processes[process_id]["status"] = "completed"
-                
-                # Debug: Log the response being sent
-                try:
-                    # Use dict access for Pydantic models or getattr for regular objects
-                    if hasattr(response, 'dict'):
-                        # It's a Pydantic model
-                        response_dict = response.dict()
-                        response_text = response_dict.get('response', 'No response generated')
-                        response_intent = response_dict.get('intent', None)
-                        response_plan = response_dict.get('plan', None)
-                        logger.info(f"Pydantic response dict: {response_dict}")
-                    else:
-                        # It's a regular object
-                        response_text = getattr(response, 'response', 'No response generated')
-                        response_intent = getattr(response, 'intent', None)
-                        response_plan = getattr(response, 'plan', None)
-                        logger.info(f"Regular object response - text: {response_text[:100]}...")
-                    
-                    response_data = {
-                        'type': 'response', 
-                        'response': response_text, 
-                        'intent': response_intent, 
-                        'plan': response_plan
-                    }
-                    logger.info(f"Sending response event: {response_data}")
-                    
-                    yield f"data: {json.dumps(response_data)}\n\n"
-                except Exception as e:
-                    logger.error(f"Error formatting response: {str(e)}, response object: {response}")
-                    logger.error(f"Response type: {type(response)}, Response attrs: {dir(response) if hasattr(response, '__dict__') else 'No __dict__'}")
-                    # Send a fallback response
-                    fallback_response = {
-                        'type': 'response',
-                        'response': 'I apologize, but there was an issue formatting the response. Please try again.',
-                        'intent': None,
-                        'plan': None
-                    }
-                    yield f"data: {json.dumps(fallback_response)}\n\n"
+                response_data = {
+                    'type': 'response',
+                    'response': result.get('response', 'No response generated'),
+                    'intent': response_intent,
+                    'plan': result.get('plan')
+                }
+                yield f"data: {json.dumps(response_data)}\n\n"
                 
                 # Send completion status
                 yield f"data: {json.dumps({'type': 'complete', 'message': 'Process completed successfully', 'process_id': process_id})}\n\n"
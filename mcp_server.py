@@ -4,9 +4,8 @@ MCP Server for Research Agent Integration with Claude
 """
 
 import asyncio
-import json
 import logging
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from mcp import ClientSession, StdioServerParameters
 from mcp.server import Server
 from mcp.server.models import InitializationOptions
@@ -19,10 +18,13 @@ from mcp.types import (
     EmbeddedResource,
     LoggingLevel
 )
-from agent.langgraph_agent import LangGraphResearchAgent
+from agent.langgraph_agent import get_langgraph_agent
+from agent.arxiv_client import SimpleResearchAgent
+from agent.knowledge_graph import get_knowledge_graph_manager
 from opentelemetry import trace
 from agent.constants import PROJECT_NAME
 import uuid
+import orjson
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -34,11 +36,14 @@ tracer = trace.get_tracer(PROJECT_NAME)
 # Create MCP server instance
 server = Server("research-agent")
 
-# Initialize research agent with shared knowledge graph
-research_agent = LangGraphResearchAgent(trace_provider=tracer)
+# Get the shared research agent (graph is compiled once per process)
+research_agent = get_langgraph_agent()
 
-# Get the shared knowledge graph instance from the agent
-knowledge_graph = research_agent.knowledge_graph
+# Direct ArXiv access for fetching a paper before handing it to the agent
+arxiv_agent = SimpleResearchAgent()
+
+# Get the shared knowledge graph instance used by the agent's tools
+knowledge_graph = get_knowledge_graph_manager()
 
 @server.list_tools()
 async def handle_list_tools() -> List[Tool]:
@@ -135,118 +140,142 @@ async def handle_list_tools() -> List[Tool]:
         )
     ]
 
+async def _research_topic(arguments: Dict[str, Any], session_id: str) -> str:
+    """Research a topic through the LangGraph agent"""
+    topic = arguments.get("topic", "")
+    max_papers = arguments.get("max_papers", 5)
+    
+    logger.info(f"Researching topic: {topic}")
+    
+    # Use the LangGraph agent to process the research request
+    result = await research_agent.process_request(
+        f"Research papers about {topic} and analyze up to {max_papers} papers",
+        session_id,
+        ""
+    )
+    
+    # Format the response
+    response_text = f"Research Results for '{topic}':\n\n"
+    response_text += result.get("response", "No response generated")
+    
+    # Add additional context if available
+    if result.get("research_data"):
+        research_data = result["research_data"]
+        related_papers = research_data.get("related_papers") or []
+        response_text += f"\n\nSummary: Found {len(related_papers)} related papers for '{research_data.get('topic') or topic}'"
+    
+    return response_text
+
+async def _query_knowledge(arguments: Dict[str, Any], session_id: str) -> str:
+    """Search the knowledge graph"""
+    query = arguments.get("query", "")
+    limit = arguments.get("limit", 10)
+    
+    logger.info(f"Querying knowledge graph: {query}")
+    
+    results = await asyncio.to_thread(knowledge_graph.search_knowledge, query, limit)
+    
+    if not results:
+        return f"No knowledge found for query: {query}"
+    
+    return f"Knowledge Search Results for '{query}':\n\n" + "".join(
+        f"{i}. {result['content'][:300]}...\n"
+        f"   Relevance Score: {result['relevance_score']:.2f}\n\n"
+        for i, result in enumerate(results, 1)
+    )
+
+async def _analyze_paper(arguments: Dict[str, Any], session_id: str) -> str:
+    """Analyze an ArXiv paper through the LangGraph agent"""
+    paper_id = arguments.get("paper_id", "")
+    
+    logger.info(f"Analyzing paper: {paper_id}")
+    
+    # Download and read the paper first so the agent starts from its metadata and abstract
+    request = f"Analyze the ArXiv paper {paper_id} in detail"
+    paper = await arxiv_agent.analyze_paper(paper_id)
+    if "error" in paper:
+        logger.warning(f"Could not fetch paper {paper_id} from ArXiv: {paper['error']}")
+    else:
+        request += (
+            f"\n\nTitle: {paper['title']}"
+            f"\nAuthors: {', '.join(paper['authors'])}"
+            f"\nAbstract: {paper['abstract']}"
+        )
+    
+    # Use the LangGraph agent to analyze the paper
+    result = await research_agent.process_request(request, session_id, "")
+    
+    response_text = f"Analysis of Paper {paper_id}:\n\n"
+    response_text += result.get("response", "No analysis generated")
+    
+    return response_text
+
+async def _get_knowledge_summary(arguments: Dict[str, Any], session_id: str) -> str:
+    """Summarize stored knowledge for a topic"""
+    topic = arguments.get("topic", "")
+    
+    logger.info(f"Getting knowledge summary for: {topic}")
+    
+    summary = await asyncio.to_thread(knowledge_graph.get_knowledge_summary, topic)
+    
+    if "error" in summary:
+        return f"Error getting knowledge summary: {summary['error']}"
+    
+    sections = [
+        f"Knowledge Summary for '{topic}':\n\n"
+        f"Related Papers: {summary.get('total_papers', 0)}\n"
+        f"Research Insights: {summary.get('total_insights', 0)}\n"
+        f"Knowledge Items: {summary.get('total_knowledge_items', 0)}\n\n"
+    ]
+    
+    # Add paper summaries
+    sections.extend(
+        f"📄 {paper.get('title', 'Unknown Title')}\n"
+        f"   Authors: {', '.join(paper.get('authors', []))}\n\n"
+        for paper in summary.get("related_papers", [])[:3]
+    )
+    
+    # Add insights
+    sections.extend(
+        f"💡 {insight.get('insight', '')[:200]}...\n\n"
+        for insight in summary.get("research_insights", [])[:3]
+    )
+    
+    return "".join(sections)
+
+async def _add_research_insight(arguments: Dict[str, Any], session_id: str) -> str:
+    """Store a research insight in the knowledge graph"""
+    insight = arguments.get("insight", "")
+    topic = arguments.get("topic", "")
+    context = arguments.get("context", {})
+    
+    logger.info(f"Adding research insight for topic: {topic}")
+    
+    success = await asyncio.to_thread(knowledge_graph.add_research_insight, insight, topic, None, context)
+    
+    if success:
+        return f"Successfully added research insight for topic: {topic}"
+    return f"Failed to add research insight for topic: {topic}"
+
+# Tool name -> handler, looked up once per call instead of walking an if/elif chain
+TOOL_HANDLERS: Dict[str, Callable[[Dict[str, Any], str], Awaitable[str]]] = {
+    "research_topic": _research_topic,
+    "query_knowledge": _query_knowledge,
+    "analyze_paper": _analyze_paper,
+    "get_knowledge_summary": _get_knowledge_summary,
+    "add_research_insight": _add_research_insight,
+}
+
 @server.call_tool()
 async def handle_call_tool(name: str, arguments: Dict[str, Any] | None) -> List[TextContent]:
     """Handle tool calls from Claude"""
     try:
-        if not arguments:
-            arguments = {}
-        
-        session_id = str(uuid.uuid4())
-        
-        if name == "research_topic":
-            topic = arguments.get("topic", "")
-            max_papers = arguments.get("max_papers", 5)
-            
-            logger.info(f"Researching topic: {topic}")
-            
-            # Use the LangGraph agent to process the research request
-            result = await research_agent.process_request(
-                f"Research papers about {topic} and analyze up to {max_papers} papers",
-                session_id
-            )
-            
-            # Format the response
-            response_text = f"Research Results for '{topic}':\n\n"
-            response_text += result.get("response", "No response generated")
-            
-            # Add additional context if available
-            if result.get("research_data"):
-                research_data = result["research_data"]
-                papers_found = research_data.get("search_results", {}).get("papers_found", 0)
-                analyzed_papers = len(research_data.get("analyzed_papers", []))
-                response_text += f"\n\nSummary: Found {papers_found} papers, analyzed {analyzed_papers} papers"
-            
-            return [TextContent(type="text", text=response_text)]
-        
-        elif name == "query_knowledge":
-            query = arguments.get("query", "")
-            limit = arguments.get("limit", 10)
-            
-            logger.info(f"Querying knowledge graph: {query}")
-            
-            results = knowledge_graph.search_knowledge(query, limit=limit)
-            
-            if not results:
-                response_text = f"No knowledge found for query: {query}"
-            else:
-                response_text = f"Knowledge Search Results for '{query}':\n\n"
-                for i, result in enumerate(results, 1):
-                    response_text += f"{i}. {result['content'][:300]}...\n"
-                    response_text += f"   Relevance Score: {result['relevance_score']:.2f}\n\n"
-            
-            return [TextContent(type="text", text=response_text)]
-        
-        elif name == "analyze_paper":
-            paper_id = arguments.get("paper_id", "")
-            
-            logger.info(f"Analyzing paper: {paper_id}")
-            
-            # Use the LangGraph agent to analyze the paper
-            result = await research_agent.process_request(
-                f"Analyze the ArXiv paper {paper_id} in detail",
-                session_id
-            )
-            
-            response_text = f"Analysis of Paper {paper_id}:\n\n"
-            response_text += result.get("response", "No analysis generated")
-            
-            return [TextContent(type="text", text=response_text)]
-        
-        elif name == "get_knowledge_summary":
-            topic = arguments.get("topic", "")
-            
-            logger.info(f"Getting knowledge summary for: {topic}")
-            
-            summary = knowledge_graph.get_knowledge_summary(topic)
-            
-            if "error" in summary:
-                response_text = f"Error getting knowledge summary: {summary['error']}"
-            else:
-                response_text = f"Knowledge Summary for '{topic}':\n\n"
-                response_text += f"Related Papers: {summary.get('total_papers', 0)}\n"
-                response_text += f"Research Insights: {summary.get('total_insights', 0)}\n"
-                response_text += f"Knowledge Items: {summary.get('total_knowledge_items', 0)}\n\n"
-                
-                # Add paper summaries
-                for paper in summary.get("related_papers", [])[:3]:
-                    response_text += f"📄 {paper.get('title', 'Unknown Title')}\n"
-                    response_text += f"   Authors: {', '.join(paper.get('authors', []))}\n\n"
-                
-                # Add insights
-                for insight in summary.get("research_insights", [])[:3]:
-                    response_text += f"💡 {insight.get('insight', '')[:200]}...\n\n"
-            
-            return [TextContent(type="text", text=response_text)]
-        
-        elif name == "add_research_insight":
-            insight = arguments.get("insight", "")
-            topic = arguments.get("topic", "")
-            context = arguments.get("context", {})
-            
-            logger.info(f"Adding research insight for topic: {topic}")
-            
-            success = knowledge_graph.add_research_insight(insight, topic, context)
-            
-            if success:
-                response_text = f"Successfully added research insight for topic: {topic}"
-            else:
-                response_text = f"Failed to add research insight for topic: {topic}"
-            
-            return [TextContent(type="text", text=response_text)]
-        
-        else:
+        handler = TOOL_HANDLERS.get(name)
+        if handler is None:
             return [TextContent(type="text", text=f"Unknown tool: {name}")]
+        
+        response_text = await handler(arguments or {}, str(uuid.uuid4()))
+        return [TextContent(type="text", text=response_text)]
     
     except Exception as e:
         logger.error(f"Error in tool call {name}: {str(e)}")
@@ -275,14 +304,14 @@ async def handle_read_resource(uri: str) -> str:
     """Read resource content"""
     try:
         if uri == "knowledge://papers":
-            memories = knowledge_graph.get_all_memories(limit=50)
+            memories = await asyncio.to_thread(knowledge_graph.get_all_memories, 50)
             papers = [m for m in memories if m.get("metadata", {}).get("type") == "research_paper"]
-            return json.dumps(papers, indent=2)
+            return orjson.dumps(papers, option=orjson.OPT_INDENT_2, default=str).decode()
         
         elif uri == "knowledge://insights":
-            memories = knowledge_graph.get_all_memories(limit=50)
+            memories = await asyncio.to_thread(knowledge_graph.get_all_memories, 50)
             insights = [m for m in memories if m.get("metadata", {}).get("type") == "research_insight"]
-            return json.dumps(insights, indent=2)
+            return orjson.dumps(insights, option=orjson.OPT_INDENT_2, default=str).decode()
         
         else:
             raise ValueError(f"Unknown resource: {uri}")
@@ -294,19 +323,23 @@ async def handle_read_resource(uri: str) -> str:
 async def main():
     """Main entry point for the MCP server"""
     # Run the stdio server
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="research-agent",
-                server_version="1.0.0",
-                capabilities=server.get_capabilities(
-                    notification_options=None,
-                    experimental_capabilities=None
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                InitializationOptions(
+                    server_name="research-agent",
+                    server_version="1.0.0",
+                    capabilities=server.get_capabilities(
+                        notification_options=None,
+                        experimental_capabilities=None
+                    )
                 )
             )
-        )
+    finally:
+        # Release pooled LLM connections
+        await research_agent.aclose()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
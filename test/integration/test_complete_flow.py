@@ -53,7 +53,7 @@ async def test_complete_workflow():
             
             print(f"✅ Intent detected: {result.get('intent', 'unknown')}")
             print(f"✅ Response generated: {len(result.get('response', ''))} characters")
-            print(f"✅ Messages in conversation: {len(result.get('messages', []))}")
+            print(f"✅ Messages in conversation: {result.get('message_count', 0)}")
             
             # Show final response (truncated)
             response = result.get('response', 'No response')
@@ -0,0 +1,131 @@
+"""
+Unit tests for the ArXiv client
+"""
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from agent.arxiv_client import SimpleArxivClient, extract_arxiv_id, pdf_filename
+from agent.constants import ARXIV_DOWNLOAD_CONCURRENCY
+
+
+def test_extract_new_style_ids():
+    assert extract_arxiv_id("2301.12345") == "2301.12345"
+    assert extract_arxiv_id("1501.0001") == "1501.0001"
+    assert extract_arxiv_id("2301.12345v2") == "2301.12345"
+
+
+def test_extract_old_style_ids():
+    assert extract_arxiv_id("hep-th/9901001") == "hep-th/9901001"
+    assert extract_arxiv_id("hep-th/9901001v3") == "hep-th/9901001"
+    assert extract_arxiv_id("math.AG/0601001") == "math.AG/0601001"
+
+
+def test_extract_ids_from_urls():
+    assert extract_arxiv_id("http://arxiv.org/abs/2301.12345v1") == "2301.12345"
+    assert extract_arxiv_id("https://arxiv.org/pdf/2301.12345v2.pdf") == "2301.12345"
+    assert extract_arxiv_id("http://arxiv.org/abs/hep-th/9901001v1") == "hep-th/9901001"
+
+
+def test_extract_returns_none_without_an_id():
+    assert extract_arxiv_id("") is None
+    assert extract_arxiv_id("not a paper") is None
+    assert extract_arxiv_id("https://arxiv.org/list/cs.LG/recent") is None
+
+
+def test_extract_does_not_match_inside_longer_numbers():
+    assert extract_arxiv_id("12345.67890") is None
+    assert extract_arxiv_id("1.2301.12345") is None
+
+
+def test_pdf_filename_flattens_old_style_ids():
+    assert pdf_filename("2301.12345") == "2301.12345.pdf"
+    assert pdf_filename("hep-th/9901001") == "hep-th_9901001.pdf"
+
+
+class FakeResult:
+    """Stand-in for an arxiv.Result with just the fields the client reads"""
+
+    def __init__(self, short_id: str):
+        self.entry_id = f"http://arxiv.org/abs/{short_id}"
+        self.title = f"Paper {short_id}"
+        self.authors = ["Author"]
+        self.summary = "Abstract"
+        self.categories = ["hep-th"]
+        self.published = None
+        self.pdf_url = f"http://arxiv.org/pdf/{short_id}"
+
+    def get_short_id(self) -> str:
+        return self.entry_id.split("arxiv.org/abs/")[-1]
+
+
+class FakeArxivClient:
+    """Returns fixed results for any search"""
+
+    def __init__(self, results):
+        self._results = results
+
+    def results(self, search):
+        return iter(self._results)
+
+
+def _client(tmp_path, results) -> SimpleArxivClient:
+    client = SimpleArxivClient(storage_path=str(tmp_path))
+    client._client = FakeArxivClient(results)
+    return client
+
+
+def test_search_keeps_old_style_archive_prefix(tmp_path):
+    client = _client(tmp_path, [FakeResult("hep-th/9901001v1"), FakeResult("2301.12345v2")])
+
+    result = asyncio.run(client.search_papers("strings"))
+    assert [paper["id"] for paper in result.data["papers"]] == ["hep-th/9901001", "2301.12345"]
+
+
+def test_fetch_papers_matches_old_style_ids(tmp_path):
+    old_style = FakeResult("hep-th/9901001v1")
+    new_style = FakeResult("2301.12345v2")
+    client = _client(tmp_path, [old_style, new_style])
+
+    papers = asyncio.run(client._fetch_papers(["hep-th/9901001", "2301.12345v2"]))
+    assert papers == {"hep-th/9901001": old_style, "2301.12345v2": new_style}
+
+
+class FailingIdArxivClient(FakeArxivClient):
+    """Fails any search whose ID list includes a withdrawn paper"""
+
+    def results(self, search):
+        if "withdrawn" in search.id_list:
+            raise ValueError("Page of results was unexpectedly empty")
+        return iter([result for result in self._results if result.get_short_id().startswith(tuple(search.id_list))])
+
+
+def test_failed_batch_lookup_falls_back_to_each_paper(tmp_path):
+    found = FakeResult("2301.12345v1")
+    client = SimpleArxivClient(storage_path=str(tmp_path))
+    client._client = FailingIdArxivClient([found])
+
+    papers, lookup_error = asyncio.run(client._lookup_papers(["2301.12345", "withdrawn"]))
+    assert lookup_error is None
+    assert papers["2301.12345"] is found
+
+    # Only the bad ID carries the lookup error
+    download_result = asyncio.run(client._download_pdf("withdrawn", papers["withdrawn"]))
+    assert not download_result.success
+    assert "unexpectedly empty" in download_result.error
+
+
+def test_download_semaphore_works_across_event_loops(tmp_path):
+    client = SimpleArxivClient(storage_path=str(tmp_path))
+
+    async def saturate():
+        # More downloads than permits, so some have to wait on the semaphore
+        async def download():
+            async with client._download_semaphore():
+                await asyncio.sleep(0)
+        await asyncio.gather(*(download() for _ in range(ARXIV_DOWNLOAD_CONCURRENCY + 2)))
+
+    asyncio.run(saturate())
+    asyncio.run(saturate())
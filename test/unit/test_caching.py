@@ -0,0 +1,88 @@
+"""
+Unit tests for the in-process caches
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from agent.caching import TTLCache, SemanticCache
+
+
+def test_ttl_cache_get_and_set():
+    cache = TTLCache(max_size=4, expiry_minutes=60)
+    assert cache.get("missing") is None
+    assert cache.get("missing", "default") == "default"
+
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(max_size=2, expiry_minutes=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(max_size=4, expiry_minutes=-1)
+    cache.set("key", "value")
+    assert cache.get("key", "expired") == "expired"
+
+
+def test_ttl_cache_clear():
+    cache = TTLCache(max_size=4, expiry_minutes=60)
+    cache.set("key", "value")
+    cache.clear()
+    assert cache.get("key") is None
+
+
+def test_semantic_cache_matches_similar_vectors():
+    cache = SemanticCache(max_size=4, expiry_minutes=60, threshold=0.95)
+    cache.set([1.0, 0.0, 0.0], "stored")
+
+    # Scale doesn't matter, only direction
+    assert cache.get([2.0, 0.05, 0.0]) == "stored"
+    assert cache.get([0.0, 1.0, 0.0]) is None
+
+
+def test_semantic_cache_returns_closest_match():
+    cache = SemanticCache(max_size=4, expiry_minutes=60, threshold=0.5)
+    cache.set([1.0, 0.0], "x")
+    cache.set([0.0, 1.0], "y")
+
+    assert cache.get([0.9, 0.2]) == "x"
+    assert cache.get([0.2, 0.9]) == "y"
+
+
+def test_semantic_cache_separates_namespaces():
+    cache = SemanticCache(max_size=4, expiry_minutes=60)
+    cache.set([1.0, 0.0], "first", namespace="a")
+
+    assert cache.get([1.0, 0.0], namespace="a") == "first"
+    assert cache.get([1.0, 0.0], namespace="b") is None
+    assert cache.get([1.0, 0.0]) is None
+
+
+def test_semantic_cache_is_bounded():
+    cache = SemanticCache(max_size=2, expiry_minutes=60)
+    cache.set([1.0, 0.0, 0.0], "a")
+    cache.set([0.0, 1.0, 0.0], "b")
+    cache.set([0.0, 0.0, 1.0], "c")
+
+    assert cache.get([1.0, 0.0, 0.0]) is None
+    assert cache.get([0.0, 0.0, 1.0]) == "c"
+
+
+def test_semantic_cache_expires_entries():
+    cache = SemanticCache(max_size=4, expiry_minutes=-1)
+    cache.set([1.0, 0.0], "value")
+    assert cache.get([1.0, 0.0], default="expired") == "expired"
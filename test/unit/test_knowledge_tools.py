@@ -0,0 +1,176 @@
+"""
+Unit tests for the knowledge tools
+"""
+
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from agent import knowledge_tools
+from agent.knowledge_tools import get_knowledge_tool, invoke_tool_cached
+
+
+class FakeTool:
+    """Stand-in for a knowledge tool that counts invocations and can be held open until released"""
+
+    def __init__(self, name: str, result=None):
+        self.name = name
+        self.result = result if result is not None else [{"content": "result"}]
+        self.calls = 0
+        self.release = None
+
+    async def ainvoke(self, args):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        else:
+            await asyncio.sleep(0.01)
+        return self.result
+
+
+def _fresh_tool(name: str = "search_knowledge", result=None) -> FakeTool:
+    knowledge_tools._tool_caches[name].clear()
+    return FakeTool(name, result)
+
+
+def test_identical_concurrent_calls_share_one_invocation():
+    tool = _fresh_tool()
+
+    async def run():
+        return await asyncio.gather(*(invoke_tool_cached(tool, {"query": "x", "limit": 5}) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert tool.calls == 1
+    assert all(result == tool.result for result in results)
+
+
+def test_repeated_calls_are_served_from_cache():
+    tool = _fresh_tool()
+
+    async def run():
+        await invoke_tool_cached(tool, {"query": "x", "limit": 5})
+        # Argument order doesn't change the cache key
+        return await invoke_tool_cached(tool, {"limit": 5, "query": "x"})
+
+    assert asyncio.run(run()) == tool.result
+    assert tool.calls == 1
+
+
+def test_different_arguments_are_not_shared():
+    tool = _fresh_tool()
+
+    async def run():
+        await asyncio.gather(
+            invoke_tool_cached(tool, {"query": "x"}),
+            invoke_tool_cached(tool, {"query": "y"})
+        )
+
+    asyncio.run(run())
+    assert tool.calls == 2
+
+
+def test_error_results_are_not_cached():
+    tool = _fresh_tool(result={"error": "knowledge graph unavailable"})
+
+    async def run():
+        await invoke_tool_cached(tool, {"query": "x"})
+        await invoke_tool_cached(tool, {"query": "x"})
+
+    asyncio.run(run())
+    assert tool.calls == 2
+
+
+def test_write_tools_are_never_cached():
+    tool = FakeTool("add_research_insight", result="stored")
+
+    async def run():
+        await asyncio.gather(*(invoke_tool_cached(tool, {"insight": "x"}) for _ in range(3)))
+
+    asyncio.run(run())
+    assert tool.calls == 3
+
+
+def test_read_overlapping_a_write_is_not_cached():
+    tool = _fresh_tool()
+
+    async def run():
+        tool.release = asyncio.Event()
+        stale_read = asyncio.create_task(invoke_tool_cached(tool, {"query": "x"}))
+        await asyncio.sleep(0)
+
+        # A write lands while the read is still running
+        knowledge_tools._invalidate_tool_cache("add_research_paper")
+
+        # Calls made after the write don't join the read that started before it
+        fresh_read = asyncio.create_task(invoke_tool_cached(tool, {"query": "x"}))
+        await asyncio.sleep(0)
+        tool.release.set()
+        await asyncio.gather(stale_read, fresh_read)
+        assert tool.calls == 2
+
+        # The read that started after the write was cached, the stale one was not
+        tool.release = None
+        await invoke_tool_cached(tool, {"query": "x"})
+
+    asyncio.run(run())
+    assert tool.calls == 2
+
+
+def test_writes_only_invalidate_the_tools_they_affect():
+    insights_tool = _fresh_tool("get_research_insights")
+
+    async def run():
+        await invoke_tool_cached(insights_tool, {"topic": "x"})
+        knowledge_tools._invalidate_tool_cache("add_research_paper")
+        await invoke_tool_cached(insights_tool, {"topic": "x"})
+
+    asyncio.run(run())
+    assert insights_tool.calls == 1
+
+
+class FakeKnowledgeGraph:
+    """Stand-in for the knowledge graph manager that records writes and reports a fixed outcome"""
+
+    def __init__(self, succeed: bool = True):
+        self.succeed = succeed
+        self.papers = []
+
+    def add_research_paper(self, paper_data):
+        self.papers.append(paper_data)
+        return self.succeed
+
+    def add_research_papers(self, papers):
+        self.papers.extend(papers)
+        return len(papers) if self.succeed else 0
+
+
+def test_async_writes_are_reported_as_pending(monkeypatch):
+    kg_manager = FakeKnowledgeGraph()
+    monkeypatch.setattr(knowledge_tools, "get_knowledge_graph_manager", lambda: kg_manager)
+    tool = get_knowledge_tool("add_research_paper")
+
+    async def run():
+        knowledge_tools.track_run_writes()
+        result = await tool.ainvoke({"paper_data": {"title": "x"}})
+        await knowledge_tools.wait_for_pending_writes()
+        return result
+
+    assert asyncio.run(run()) == {"status": "pending"}
+    assert kg_manager.papers == [{"title": "x"}]
+
+
+def test_sync_writes_finish_before_returning(monkeypatch):
+    kg_manager = FakeKnowledgeGraph()
+    monkeypatch.setattr(knowledge_tools, "get_knowledge_graph_manager", lambda: kg_manager)
+
+    result = get_knowledge_tool("add_research_papers").invoke({"papers": [{"title": "x"}, {"title": "y"}]})
+    assert result == {"status": "stored", "papers": 2}
+    assert len(kg_manager.papers) == 2
+
+
+def test_sync_write_failures_are_reported(monkeypatch):
+    monkeypatch.setattr(knowledge_tools, "get_knowledge_graph_manager", lambda: FakeKnowledgeGraph(succeed=False))
+
+    result = get_knowledge_tool("add_research_paper").invoke({"paper_data": {"title": "x"}})
+    assert result == {"status": "failed"}
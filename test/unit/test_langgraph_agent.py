@@ -0,0 +1,185 @@
+"""
+Unit tests for the LangGraph agent's message, tool call and tool result handling
+"""
+
+import asyncio
+import sys
+import os
+import weakref
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from agent.constants import LLM_MAX_CONCURRENCY, MAX_MESSAGE_HISTORY
+from agent import langgraph_agent
+from agent.langgraph_agent import LangGraphResearchAgent, add_messages_bounded, truncate_to_tokens
+
+
+def _agent() -> LangGraphResearchAgent:
+    # The helpers under test don't touch any instance state, so skip building LLM clients and the graph
+    return LangGraphResearchAgent.__new__(LangGraphResearchAgent)
+
+
+def _turn(index: int) -> list:
+    """One user turn with a tool call, its result and the final answer"""
+    return [
+        HumanMessage(content=f"request {index}"),
+        AIMessage(content="", tool_calls=[{"name": "search_knowledge", "args": {"query": str(index)}, "id": f"call-{index}"}]),
+        ToolMessage(content=f"result {index}", tool_call_id=f"call-{index}"),
+        AIMessage(content=f"answer {index}"),
+    ]
+
+
+def test_add_messages_bounded_keeps_short_history():
+    history = add_messages_bounded([], _turn(0))
+    merged = add_messages_bounded(history, _turn(1))
+    assert [msg.content for msg in merged] == [msg.content for msg in _turn(0) + _turn(1)]
+
+
+def test_add_messages_bounded_trims_to_whole_turns():
+    history = []
+    for index in range(MAX_MESSAGE_HISTORY // 4 + 5):
+        history = add_messages_bounded(history, _turn(index))
+
+    assert len(history) <= MAX_MESSAGE_HISTORY
+    assert isinstance(history[0], HumanMessage)
+    assert history[-1].content == f"answer {MAX_MESSAGE_HISTORY // 4 + 4}"
+
+    # Every tool result still follows the AI message that requested it
+    requested = {tool_call["id"] for msg in history for tool_call in getattr(msg, "tool_calls", None) or []}
+    assert all(msg.tool_call_id in requested for msg in history if isinstance(msg, ToolMessage))
+
+
+def test_add_messages_bounded_keeps_oversized_turn_whole():
+    oversized_turn = [HumanMessage(content="request")] + [
+        AIMessage(content=f"step {index}") for index in range(MAX_MESSAGE_HISTORY + 10)
+    ]
+    merged = add_messages_bounded([], oversized_turn)
+    assert len(merged) == len(oversized_turn)
+
+
+def test_dedupe_tool_calls_skips_repeats_within_the_turn():
+    messages = [
+        HumanMessage(content="earlier request"),
+        AIMessage(content="", tool_calls=[{"name": "search_knowledge", "args": {"query": "old"}, "id": "1"}]),
+        HumanMessage(content="current request"),
+        AIMessage(content="", tool_calls=[{"name": "search_knowledge", "args": {"query": "x", "limit": 5}, "id": "2"}]),
+    ]
+    tool_calls = [
+        # Same call as earlier in this turn, with the arguments in a different order
+        {"name": "search_knowledge", "args": {"limit": 5, "query": "x"}, "id": "3"},
+        # Made in a previous turn, so it runs again
+        {"name": "search_knowledge", "args": {"query": "old"}, "id": "4"},
+        {"name": "get_related_papers", "args": {"topic": "y"}, "id": "5"},
+        # Repeated within the same response
+        {"name": "get_related_papers", "args": {"topic": "y"}, "id": "6"},
+    ]
+
+    unique_calls = _agent()._dedupe_tool_calls(tool_calls, messages)
+    assert [tool_call["id"] for tool_call in unique_calls] == ["4", "5"]
+
+
+def test_select_tool_results_keeps_most_recent_within_budget():
+    tool_results = [
+        {"tool": "search_knowledge", "result": "oldest", "tokens": 40},
+        {"tool": "get_related_papers", "result": "middle", "tokens": 30},
+        {"tool": "search_knowledge", "result": "newest", "tokens": 50},
+    ]
+
+    selected = _agent()._select_tool_results(tool_results, budget=90)
+    assert selected == [
+        {"tool": "get_related_papers", "result": "middle"},
+        {"tool": "search_knowledge", "result": "newest"},
+    ]
+
+
+def test_select_tool_results_drops_duplicates():
+    tool_results = [
+        {"tool": "search_knowledge", "result": "same", "tokens": 10},
+        {"tool": "get_related_papers", "result": "other", "tokens": 10},
+        {"tool": "search_knowledge", "result": "same", "tokens": 10},
+    ]
+
+    selected = _agent()._select_tool_results(tool_results, budget=100)
+    assert selected == [
+        {"tool": "get_related_papers", "result": "other"},
+        {"tool": "search_knowledge", "result": "same"},
+    ]
+
+
+def test_select_tool_results_stops_at_first_result_over_budget():
+    tool_results = [
+        {"tool": "search_knowledge", "result": "small", "tokens": 5},
+        {"tool": "get_related_papers", "result": "large", "tokens": 500},
+        {"tool": "search_knowledge", "result": "recent", "tokens": 5},
+    ]
+
+    # Older results are never picked over a newer one that didn't fit
+    selected = _agent()._select_tool_results(tool_results, budget=100)
+    assert selected == [{"tool": "search_knowledge", "result": "recent"}]
+
+
+def test_truncate_to_tokens_estimates_until_the_tokenizer_is_loaded():
+    langgraph_agent._token_encoding.cache_clear()
+
+    # Without a loaded tokenizer the budget is applied to characters instead of tokenizing on the caller's thread
+    assert truncate_to_tokens("short", 10) == ("short", 2)
+    assert truncate_to_tokens("a" * 100, 10) == ("a" * 10 * langgraph_agent.CHARS_PER_TOKEN + "...", 10)
+    assert langgraph_agent._token_encoding.cache_info().currsize == 0
+
+
+def test_setup_failure_still_reaches_the_agent():
+    agent = _agent()
+
+    async def detect_intent(user_request, context):
+        raise RuntimeError("intent LLM unavailable")
+
+    async def prefetch_knowledge(user_request):
+        return []
+
+    agent._detect_intent = detect_intent
+    agent._prefetch_knowledge = prefetch_knowledge
+
+    update = asyncio.run(agent._intent_and_setup_node({"user_request": "research transformers", "context": "", "messages": []}))
+    assert agent._route_by_intent(update) == "agent"
+    assert [msg.content for msg in update["messages"]] == ["research transformers"]
+
+
+def test_related_papers_are_fetched_while_the_knowledge_prefetch_runs():
+    agent = _agent()
+    papers_requested = asyncio.Event()
+
+    async def detect_intent(user_request, context):
+        return {"intent": "research", "topic": "transformers", "suggested_tools": [], "instructions": ""}
+
+    async def prefetch_related_papers(topic):
+        papers_requested.set()
+        return [{"title": "paper"}]
+
+    async def prefetch_knowledge(user_request):
+        # Only finishes if the paper lookup starts before the knowledge search is done
+        await asyncio.wait_for(papers_requested.wait(), timeout=1)
+        return [{"content": "known"}]
+
+    agent._detect_intent = detect_intent
+    agent._prefetch_related_papers = prefetch_related_papers
+    agent._prefetch_knowledge = prefetch_knowledge
+
+    update = asyncio.run(agent._intent_and_setup_node({"user_request": "research transformers", "context": ""}))
+    assert update["intent"] == "research"
+    assert update["research_data"] == {"topic": "transformers", "related_papers": [{"title": "paper"}]}
+    assert update["knowledge_data"]["results"] == [{"content": "known"}]
+
+
+def test_llm_semaphore_works_across_event_loops():
+    agent = _agent()
+    agent._llm_semaphores = weakref.WeakKeyDictionary()
+
+    async def saturate():
+        # More callers than permits, so some have to wait on the semaphore
+        async def call():
+            async with agent._llm_semaphore():
+                await asyncio.sleep(0)
+        await asyncio.gather(*(call() for _ in range(LLM_MAX_CONCURRENCY + 2)))
+
+    asyncio.run(saturate())
+    asyncio.run(saturate())